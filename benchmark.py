@@ -0,0 +1,251 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import columnar_transposition
+import rail_fence
+import shift_cipher
+
+amostra = ("ESTE TEXTO SOBRE A CASA FALA DA HISTORIA DE UM POVO QUE VIVIA PERTO DO MAR E QUE PESCAVA TODOS OS DIAS "
+           "COM SEUS FILHOS ENQUANTO A CIDADE CRESCIA AO REDOR DO PORTO E DAS ESTRADAS QUE LEVAVAM PARA O INTERIOR ")   # texto base das entradas
+unidades = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}                                                                  # sufixos aceitos em --tamanhos
+
+
+def le_tamanho(valor):
+    """
+    Converte um tamanho como "1K", "10M" ou "512" em bytes.
+
+    Parâmetros:
+    - valor: o tamanho, com sufixo K, M ou G opcional.
+
+    Retorna:
+    - o tamanho em bytes.
+    """
+
+    valor = valor.strip().upper()
+    if valor[-1] in unidades:
+        return int(float(valor[:-1]) * unidades[valor[-1]])
+    return int(valor)
+
+
+def gera_texto(tamanho, semente=0):
+    """
+    Gera um texto reproduzível com o tamanho pedido, embaralhando as palavras da amostra.
+
+    Parâmetros:
+    - tamanho: o tamanho do texto, em caracteres.
+    - semente: semente do gerador aleatório.
+
+    Retorna:
+    - texto: uma string ASCII com letras maiúsculas e espaços.
+    """
+
+    sorteio = random.Random(semente)
+    palavras = amostra.split()
+    bloco = " ".join(sorteio.choice(palavras) for _ in range(2000)) + " "
+    texto = bloco * (tamanho // len(bloco) + 1)
+    return texto[:tamanho]
+
+
+def gera_letras(tamanho, semente=0):
+    """
+    Gera um texto reproduzível só com letras maiúsculas, como os textos cifrados das transposições.
+    """
+
+    return gera_texto(tamanho * 6 // 5 + 16, semente).replace(" ", "")[:tamanho]
+
+
+def casos(tamanhos, max_tamanho_quebra, linhas, chaves):
+    """
+    Monta os casos do benchmark, varrendo tamanhos de entrada, quantidades de rails e tamanhos de chave.
+    A entrada de cada caso é preparada fora da medição.
+
+    Parâmetros:
+    - tamanhos: tamanhos de entrada, em bytes.
+    - max_tamanho_quebra: maior entrada usada pelas quebras que decifram todos os candidatos.
+    - linhas: quantidades de rails.
+    - chaves: tamanhos de chave da transposição colunar.
+
+    Retorna:
+    - um gerador de (nome, parametros, preparo), em que preparo() retorna a função a ser medida, já com a entrada.
+    """
+
+    for tamanho in tamanhos:
+        yield "shift_cipher", {"tamanho": tamanho}, lambda t=tamanho: (
+            lambda texto=gera_texto(t): shift_cipher.shift_cipher(texto, 3))
+        yield "distribuicao_frequencia", {"tamanho": tamanho}, lambda t=tamanho: (
+            lambda texto=shift_cipher.shift_cipher(gera_texto(t), 3): shift_cipher.distribuicao_frequencia(texto))
+        if tamanho <= max_tamanho_quebra:
+            yield "forca_bruta", {"tamanho": tamanho}, lambda t=tamanho: (
+                lambda texto=shift_cipher.shift_cipher(gera_texto(t), 3): shift_cipher.forca_bruta(texto))
+
+        for n in linhas:
+            yield "rail_fence", {"tamanho": tamanho, "linhas": n}, lambda t=tamanho, n=n: (
+                lambda texto=gera_texto(t): rail_fence.rail_fence(texto, n))
+            if tamanho <= max_tamanho_quebra:
+                yield "rail_fence.quebra_cifra", {"tamanho": tamanho, "max_linhas": n}, lambda t=tamanho, n=n: (
+                    lambda texto=rail_fence.rail_fence(gera_texto(t), n): rail_fence.quebra_cifra(texto, n + 1))
+
+        for k in chaves:
+            chave = "".join(random.Random(k).sample("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k))
+            yield "transposition_cipher", {"tamanho": tamanho, "chave": k}, lambda t=tamanho, chave=chave: (
+                lambda texto=gera_texto(t): columnar_transposition.transposition_cipher(texto, chave))
+
+    # As quebras da transposição colunar crescem com o fatorial da chave: o texto tem tamanho fixo.
+    for k in chaves:
+        if k > 9:
+            continue
+        chave = "".join(random.Random(k).sample("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k))
+
+        def cifrado(chave=chave):
+            return columnar_transposition.transposition_cipher(gera_letras(60 * len(chave)), chave).replace(" ", "")
+
+        yield "analise_frequencia", {"chave": k}, lambda chave=chave, cifrado=cifrado: (
+            lambda bloco=columnar_transposition.divide_texto(cifrado(), len(chave)):
+            columnar_transposition.analise_frequencia(bloco))
+        yield "columnar_transposition.quebra_cifra", {"chave": k}, lambda chave=chave, cifrado=cifrado: (
+            lambda texto=cifrado(): columnar_transposition.quebra_cifra(texto, max_chave=len(chave)))
+
+
+def mede(funcao, tempo_minimo=0.2, repeticoes=3):
+    """
+    Mede o tempo e o pico de memória de uma função.
+    Uma primeira chamada, fora da medição, carrega caches e o modelo de linguagem.
+    Funções rápidas são repetidas até somarem tempo_minimo, e o tempo é o menor entre as repetições.
+    O pico de memória é medido numa execução separada, já que o tracemalloc deixa o código mais lento.
+
+    Parâmetros:
+    - funcao: a função, sem parâmetros.
+    - tempo_minimo: tempo mínimo de cada repetição, em segundos.
+    - repeticoes: quantas repetições.
+
+    Retorna:
+    - segundos: o tempo de uma chamada.
+    - memoria_pico: o maior uso de memória durante uma chamada, em bytes.
+    """
+
+    funcao()
+    # Como no timeit, o coletor de lixo fica desligado durante a medição, para não somar ruído ao tempo.
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        funcao()
+        segundos = time.perf_counter() - inicio
+        vezes = max(int(tempo_minimo / max(segundos, 1e-9)), 1)
+
+        for _ in range(repeticoes - 1):
+            inicio = time.perf_counter()
+            for _ in range(vezes):
+                funcao()
+            segundos = min(segundos, (time.perf_counter() - inicio) / vezes)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        funcao()
+        memoria_pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return segundos, memoria_pico
+
+
+def executa(tamanhos, max_tamanho_quebra, linhas, chaves, filtro=None, saida_progresso=sys.stderr):
+    """
+    Executa todos os casos do benchmark.
+
+    Parâmetros:
+    - tamanhos, max_tamanho_quebra, linhas, chaves: a varredura, como em casos.
+    - filtro: se informado, só os casos cujo nome contém esse texto são executados.
+    - saida_progresso: onde escrever uma linha por caso medido (None para não escrever).
+
+    Retorna:
+    - resultado: um dicionário com o ambiente e, para cada caso, o tempo e o pico de memória.
+    """
+
+    resultado = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": shift_cipher.np is not None,
+        },
+        "casos": {},
+    }
+    for nome, parametros, preparo in casos(tamanhos, max_tamanho_quebra, linhas, chaves):
+        if filtro and filtro not in nome:
+            continue
+        identificador = nome + "[" + ",".join(f"{chave}={valor}" for chave, valor in parametros.items()) + "]"
+        segundos, memoria_pico = mede(preparo())
+        resultado["casos"][identificador] = {"funcao": nome, "parametros": parametros,
+                                             "segundos": segundos, "memoria_pico": memoria_pico}
+        if saida_progresso is not None:
+            print(f"{identificador:60} {segundos * 1000:12.3f} ms {memoria_pico / (1 << 20):10.2f} MB", file=saida_progresso)
+    return resultado
+
+
+def compara(resultado, base, limite=0.25, tolerancia=1e-3):
+    """
+    Compara um resultado com uma base salva. Só os casos presentes na base são acompanhados.
+
+    Parâmetros:
+    - resultado: o resultado de executa.
+    - base: um resultado anterior, usado como referência.
+    - limite: piora relativa tolerada (0.25 aceita até 25% a mais de tempo ou de memória).
+    - tolerancia: diferença absoluta de tempo, em segundos, abaixo da qual a variação é ignorada.
+
+    Retorna:
+    - regressoes: uma lista de (caso, medida, valor na base, valor atual).
+    """
+
+    regressoes = []
+    for caso, referencia in base["casos"].items():
+        atual = resultado["casos"].get(caso)
+        if atual is None:
+            continue
+        if atual["segundos"] > referencia["segundos"] * (1 + limite) + tolerancia:
+            regressoes.append((caso, "segundos", referencia["segundos"], atual["segundos"]))
+        if atual["memoria_pico"] > referencia["memoria_pico"] * (1 + limite) + 4096:
+            regressoes.append((caso, "memoria_pico", referencia["memoria_pico"], atual["memoria_pico"]))
+    return regressoes
+
+
+def main():
+    """
+    Executa o benchmark pela linha de comando.
+    Exemplo: python benchmark.py --tamanhos 1K,1M,100M --saida resultado.json --base base.json
+    """
+
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Mede o tempo e a memória das cifras e das quebras.")
+    parser.add_argument("--tamanhos", default="1K,100K,10M", help="tamanhos das entradas, separados por vírgula")
+    parser.add_argument("--max-quebra", default="1M", help="maior entrada das quebras que decifram todos os candidatos")
+    parser.add_argument("--linhas", default="3,10,100", help="quantidades de rails, separadas por vírgula")
+    parser.add_argument("--chaves", default="4,6,8,12", help="tamanhos de chave da transposição colunar")
+    parser.add_argument("--filtro", default=None, help="executa só os casos cujo nome contém esse texto")
+    parser.add_argument("--saida", default=None, help="arquivo JSON com o resultado")
+    parser.add_argument("--base", default=None, help="arquivo JSON de um resultado anterior, para detectar regressões")
+    parser.add_argument("--limite", type=float, default=0.25, help="piora relativa tolerada em relação à base")
+    args = parser.parse_args()
+
+    resultado = executa([le_tamanho(t) for t in args.tamanhos.split(",")], le_tamanho(args.max_quebra),
+                        [int(n) for n in args.linhas.split(",")], [int(k) for k in args.chaves.split(",")], args.filtro)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            regressoes = compara(resultado, json.load(arquivo), args.limite)
+        for caso, medida, antes, depois in regressoes:
+            print(f"REGRESSÃO {caso} {medida}: {antes:.6g} -> {depois:.6g}", file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class Cache:
+    """
+    Cache de resultados das quebras, endereçado pelo conteúdo: a chave é um hash do algoritmo,
+    do texto cifrado normalizado, dos parâmetros e da versão do pontuador.
+    Tem dois níveis: um LRU em memória, com um número máximo de resultados, e, se um caminho for informado,
+    um banco SQLite em disco, com um tamanho máximo em bytes. No disco, os resultados usados há mais tempo
+    são removidos primeiro.
+
+    Uso: as funções de quebra recebem um objeto destes no parâmetro cache.
+    Os resultados em memória são devolvidos como foram guardados, então não devem ser modificados.
+    """
+
+    def __init__(self, caminho=None, max_itens=256, max_bytes=256 << 20):
+        """
+        Parâmetros:
+        - caminho: arquivo do banco SQLite (None mantém só o nível em memória).
+        - max_itens: quantos resultados o nível em memória guarda.
+        - max_bytes: tamanho máximo dos resultados no disco, em bytes.
+        """
+
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.memoria = OrderedDict()
+        self.contadores = dict.fromkeys(("acertos_memoria", "acertos_disco", "falhas", "removidos"), 0)
+        self.banco = None
+        self.bytes_disco = 0
+        if caminho is not None:
+            self.banco = sqlite3.connect(caminho)
+            self.banco.execute("CREATE TABLE IF NOT EXISTS resultados "
+                               "(chave TEXT PRIMARY KEY, valor BLOB NOT NULL, tamanho INTEGER NOT NULL, acesso REAL NOT NULL)")
+            self.banco.execute("CREATE INDEX IF NOT EXISTS resultados_acesso ON resultados (acesso)")
+            self.banco.commit()
+            self.bytes_disco = self.banco.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+
+    @staticmethod
+    def chave(algoritmo, texto, parametros=None, versao=None):
+        """
+        Calcula a chave de um resultado.
+
+        Parâmetros:
+        - algoritmo: o nome da função de quebra.
+        - texto: o texto cifrado, já normalizado.
+        - parametros: um dicionário com os parâmetros que mudam o resultado.
+        - versao: a versão do pontuador (por exemplo, a assinatura do modelo de linguagem).
+
+        Retorna:
+        - um hash SHA-256, em hexadecimal.
+        """
+
+        resumo = hashlib.sha256()
+        cabecalho = json.dumps([algoritmo, parametros or {}, versao], sort_keys=True, default=repr)
+        resumo.update(cabecalho.encode("utf-8"))
+        resumo.update(b"\0")
+        resumo.update(texto.encode("utf-8") if isinstance(texto, str) else bytes(texto))
+        return resumo.hexdigest()
+
+    def busca(self, chave):
+        """
+        Procura um resultado, primeiro na memória e depois no disco.
+
+        Retorna:
+        - encontrado: True se o resultado estava no cache.
+        - valor: o resultado, ou None.
+        """
+
+        if chave in self.memoria:
+            self.memoria.move_to_end(chave)
+            self.contadores["acertos_memoria"] += 1
+            return True, self.memoria[chave]
+
+        if self.banco is not None:
+            linha = self.banco.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha is not None:
+                self.banco.execute("UPDATE resultados SET acesso = ? WHERE chave = ?", (time.time(), chave))
+                self.banco.commit()
+                valor = pickle.loads(linha[0])
+                self.guarda_memoria(chave, valor)
+                self.contadores["acertos_disco"] += 1
+                return True, valor
+
+        self.contadores["falhas"] += 1
+        return False, None
+
+    def guarda(self, chave, valor):
+        """
+        Guarda um resultado nos dois níveis.
+        """
+
+        self.guarda_memoria(chave, valor)
+        if self.banco is None:
+            return
+
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dados) > self.max_bytes:
+            return
+        antigo = self.banco.execute("SELECT tamanho FROM resultados WHERE chave = ?", (chave,)).fetchone()
+        self.banco.execute("INSERT OR REPLACE INTO resultados (chave, valor, tamanho, acesso) VALUES (?, ?, ?, ?)",
+                           (chave, dados, len(dados), time.time()))
+        self.bytes_disco += len(dados) - (antigo[0] if antigo else 0)
+        self.remove_excesso()
+        self.banco.commit()
+
+    def guarda_memoria(self, chave, valor):
+        """
+        Guarda um resultado no nível em memória, removendo o usado há mais tempo se ele estiver cheio.
+        """
+
+        self.memoria[chave] = valor
+        self.memoria.move_to_end(chave)
+        while len(self.memoria) > self.max_itens:
+            self.memoria.popitem(last=False)
+
+    def remove_excesso(self):
+        """
+        Remove do disco os resultados usados há mais tempo até o total caber em max_bytes.
+        """
+
+        while self.bytes_disco > self.max_bytes:
+            antigos = self.banco.execute("SELECT chave, tamanho FROM resultados ORDER BY acesso LIMIT 64").fetchall()
+            if not antigos:
+                self.bytes_disco = 0
+                break
+            for chave, tamanho in antigos:
+                self.banco.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+                self.bytes_disco -= tamanho
+                self.contadores["removidos"] += 1
+                if self.bytes_disco <= self.max_bytes:
+                    break
+
+    def obtem(self, algoritmo, texto, parametros, calcula, versao=None):
+        """
+        Retorna o resultado guardado ou, se ele não estiver no cache, calcula e guarda.
+
+        Parâmetros:
+        - algoritmo, texto, parametros, versao: como em chave.
+        - calcula: uma função sem parâmetros que calcula o resultado.
+
+        Retorna:
+        - o resultado.
+        """
+
+        chave = self.chave(algoritmo, texto, parametros, versao)
+        encontrado, valor = self.busca(chave)
+        if not encontrado:
+            valor = calcula()
+            self.guarda(chave, valor)
+        return valor
+
+    def estatisticas(self):
+        """
+        Retorna os acertos e falhas de cada nível, a taxa de acerto e o uso de memória e disco.
+        """
+
+        consultas = sum(self.contadores[nome] for nome in ("acertos_memoria", "acertos_disco", "falhas"))
+        acertos = self.contadores["acertos_memoria"] + self.contadores["acertos_disco"]
+        return dict(self.contadores, taxa_acerto=acertos / consultas if consultas else 0.0,
+                    itens_memoria=len(self.memoria), bytes_disco=self.bytes_disco)
+
+    def fecha(self):
+        """
+        Fecha o banco em disco.
+        """
+
+        if self.banco is not None:
+            self.banco.close()
+            self.banco = None
@@ -1,109 +1,223 @@
+import math
+import os
+import random
+import time
 from collections import Counter
-from itertools import permutations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from multiprocessing import Value
+
+from instrumentacao import etapa
+from modelo_linguagem import codigos, modelo
+from texto import Texto, letra_x
+
 
 def transposition_cipher(plaintext, key):
     """
     Cifra uma mensagem usando a técnica de transposição colunar.
 
     Parâmetros:
-    - plaintext: mensagem original.
+    - plaintext: mensagem original (str ou Texto).
     - key: palavra chave para criptografar.
 
     Retorna:
-    - ciphertext: mensagem cifrada.
+    - ciphertext: mensagem cifrada. Com um Texto, o resultado é um Texto, sem os espaços entre as colunas.
     """
 
-    matriz = [[] for _ in range(len(key))]
-    counter = 0
-    for letra in plaintext:
-        if letra != " ":
-            matriz[counter].append(letra.upper())
-            counter = (counter + 1) % len(key) 
+    return transpoe_colunas(plaintext, compila_chave(key))
+
+
+def transpoe_colunas(plaintext, ordem):
+    """
+    Cifra uma mensagem com uma chave já compilada por compila_chave.
+
+    Parâmetros:
+    - plaintext: mensagem original (str ou Texto).
+    - ordem: a ordem de leitura das colunas.
+
+    Retorna:
+    - ciphertext: mensagem cifrada, como em transposition_cipher.
+    """
 
-    matriz = completa_matriz(matriz)    
-    matriz = ordena_matriz(matriz, key)
+    colunas = len(ordem)
+    if isinstance(plaintext, Texto):
+        codigos_texto = plaintext.bytes()
+        codigos_texto += bytes([letra_x]) * (-len(codigos_texto) % colunas)
+        return plaintext.com_codigos(b"".join(codigos_texto[coluna::colunas] for coluna in ordem))
 
-    ciphertext = ""
-    for coluna in matriz:
-        for letra in coluna:
-            ciphertext += letra
-        ciphertext += " "
+    texto = plaintext.replace(" ", "").upper()
+    linhas = -(-len(texto) // colunas)
 
+    # Completa a última linha com X, para que todas as colunas tenham o mesmo tamanho.
+    texto += "X" * (linhas * colunas - len(texto))
+    ciphertext = "".join(texto[coluna::colunas] + " " for coluna in ordem)
     return ciphertext
 
 
-def completa_matriz(matriz):
+@lru_cache(maxsize=256)
+def compila_chave(key):
+    """
+    Transforma a chave na ordem de leitura das colunas, uma única vez por chave.
+
+    Parâmetros:
+    - key: palavra chave.
+
+    Retorna:
+    - ordem: os índices das colunas da matriz, na ordem alfabética das letras da chave.
+    """
+
+    if not key:
+        raise ValueError("A chave não pode ser vazia.")
+    ordem = tuple(sorted(range(len(key)), key=lambda i: key[i]))
+    return ordem
+
+
+def decifra(ciphertext, key):
+    """
+    Decifra uma mensagem cifrada por transposição colunar, conhecendo a chave.
+    Os X usados para completar a matriz continuam no final da mensagem.
+
+    Parâmetros:
+    - ciphertext: mensagem cifrada (str ou Texto).
+    - key: palavra chave usada para criptografar.
+
+    Retorna:
+    - plaintext: mensagem original, sem espaços e em maiúsculas (um Texto, se a mensagem cifrada for um Texto).
     """
-    Preenche os espaços vazios para se tornar uma matriz completa.
+
+    return repoe_colunas(ciphertext, compila_chave(key))
+
+
+def repoe_colunas(ciphertext, ordem):
+    """
+    Decifra uma mensagem com uma chave já compilada por compila_chave.
 
     Parâmetros:
-    - matriz: matriz que será completada.
+    - ciphertext: mensagem cifrada (str ou Texto).
+    - ordem: a ordem de leitura das colunas.
 
     Retorna:
-    - matriz: matriz como linhas de mesmo tamanho.
+    - plaintext: mensagem original, como em decifra.
     """
 
-    tamanho = len(matriz[0])
-    for coluna in matriz:
-        if len(coluna) < tamanho:
-            coluna.append("X")
-    return matriz        
+    texto = ciphertext if isinstance(ciphertext, Texto) else ciphertext.replace(" ", "")
+    colunas = len(ordem)
+    if len(texto) % colunas:
+        raise ValueError("O tamanho do texto cifrado deve ser múltiplo do tamanho da chave.")
+    linhas = len(texto) // colunas
+
+    # A coluna lida na posição p do texto cifrado volta para as posições coluna, coluna + colunas...
+    if isinstance(texto, Texto):
+        plaintext, fonte = bytearray(len(texto)), texto.bytes()
+    elif texto.isascii():
+        plaintext, fonte = bytearray(len(texto)), texto.encode("ascii")
+    else:
+        plaintext, fonte = [""] * len(texto), texto
+    for posicao, coluna in enumerate(ordem):
+        plaintext[coluna::colunas] = fonte[posicao * linhas:(posicao + 1) * linhas]
+    if isinstance(texto, Texto):
+        return texto.com_codigos(bytes(plaintext))
+    return plaintext.decode("ascii") if isinstance(plaintext, bytearray) else "".join(plaintext)
+
+
+def cifra_lote(mensagens, key):
+    """
+    Cifra várias mensagens com a mesma chave, compilando a chave uma única vez.
 
+    Parâmetros:
+    - mensagens: uma lista de mensagens.
+    - key: palavra chave para criptografar.
 
-def ordena_matriz(matriz, key):
+    Retorna:
+    - uma lista com as mensagens cifradas.
+    """
+
+    ordem = compila_chave(key)
+    return [transpoe_colunas(mensagem, ordem) for mensagem in mensagens]
+
+
+def decifra_lote(mensagens, key):
     """
-    Ordena as colunas da matriz de acordo com a ordenação da chave.
+    Decifra várias mensagens com a mesma chave, compilando a chave uma única vez.
 
     Parâmetros:
-    - matriz: matriz contendo letras em cada coluna.
-    - key: chave que ditará a ordem de leitura da matriz.
+    - mensagens: uma lista de mensagens cifradas.
+    - key: palavra chave usada para criptografar.
 
     Retorna:
-    - nova_matriz: matriz com as colunas ordenadas.
+    - uma lista com as mensagens decifradas.
     """
 
-    nova_matriz = []
-    letra_coluna = [(l, c) for l,c in zip(key, matriz)]
-    letra_coluna.sort(key=lambda x: x[0])
-    for tupla in letra_coluna:
-        nova_matriz.append(tupla[1])
-    return nova_matriz  
+    ordem = compila_chave(key)
+    return [repoe_colunas(mensagem, ordem) for mensagem in mensagens]
 
 
-def quebra_cifra(ciphertext):
+def quebra_cifra(ciphertext, max_chave=10, metodo=None, limite_exaustivo=8, estatisticas=None, cache=None, crib=None,
+                 **opcoes):
     """
     Decifra uma mensagem crptografada por transposição de colunas.
 
     Parâmetros:
     - ciphertext: mensagem cifrada.
+    - max_chave: maior tamanho de chave considerado.
+    - metodo: None usa a busca exaustiva até limite_exaustivo colunas e a têmpera acima disso;
+      "exaustiva", "subida", "tempera" ou "feixe" forçam um método para todas as chaves.
+    - limite_exaustivo: maior quantidade de colunas em que a busca exaustiva é usada por padrão.
+    - estatisticas: um instrumentacao.Estatisticas, preenchido com os contadores e tempos de todas as chaves.
+    - cache: um cache.Cache; se o mesmo texto já foi quebrado com os mesmos parâmetros e o mesmo modelo de linguagem,
+      o resultado guardado é retornado (opcional).
+    - crib: um trecho que a mensagem original contém (opcional). Nas chaves em que ele deixa no máximo
+      limite_exaustivo // 2 colunas livres, a busca exaustiva é usada, descartando as ordenações de colunas que não
+      podem formá-lo; nas outras, o método de sempre é usado e as respostas sem o crib são descartadas.
+    - opcoes: parâmetros repassados para busca_heuristica (reinicios, max_candidatos, tempo_limite...).
 
     Retorna:
     - possiveis_respostas: uma lista com as possiveis respostas e o tamanho de suas chaves.
     """
 
-    ciphertext = ciphertext.replace(" ", "")
-    chaves = acha_divisores(ciphertext)
+    ciphertext = ciphertext.letras() if isinstance(ciphertext, Texto) else ciphertext.replace(" ", "").upper()
+    if crib is not None:
+        crib = crib.replace(" ", "").upper() or None                                  # um crib vazio não restringe nada
+    if cache is not None:
+        parametros = dict(opcoes, max_chave=max_chave, metodo=metodo, limite_exaustivo=limite_exaustivo, crib=crib)
+        return cache.obtem("columnar_transposition.quebra_cifra", ciphertext, parametros,
+                           lambda: quebra_cifra(ciphertext, max_chave, metodo, limite_exaustivo, estatisticas,
+                                                crib=crib, **opcoes),
+                           versao=modelo("pt").assinatura())
+
+    chaves = acha_divisores(ciphertext, max_chave)
     possiveis_respostas = []
     for chave in chaves:
         colunas = divide_texto(ciphertext, chave)
-        mensagem = analise_frequencia(colunas)
+        # Um crib curto deixa muitas colunas livres e quase não poda, então só ele não justifica a busca exaustiva.
+        restrita = crib is not None and chave - len(crib) <= limite_exaustivo // 2
+        escolhido = metodo or ("exaustiva" if chave <= limite_exaustivo or restrita else "tempera")
+        if escolhido == "exaustiva":
+            mensagem = analise_frequencia(colunas, estatisticas, crib)
+            if mensagem is None:
+                continue
+        else:
+            mensagem = busca_heuristica(colunas, escolhido, estatisticas=estatisticas, **opcoes)
+            if crib is not None and crib not in "".join("".join(linha) for linha in zip(*mensagem)):
+                continue
         possiveis_respostas.append((chave, mensagem))
-    return possiveis_respostas    
+    return possiveis_respostas
 
 
-def acha_divisores(texto):
+def acha_divisores(texto, max_chave=10):
     """
     Encontra os divisores da quantidade de letras no texto.
 
 
     Parâmetros:
     - texto: uma mensagem.
+    - max_chave: maior divisor considerado.
 
     Retorna:
     - divisores: os números que dividem o tamanho do texto.
     """
     divisores = []
-    for i in range(1, 11):
+    for i in range(1, max_chave + 1):
         if (len(texto) == i):
             break
         elif (len(texto) % i) == 0:
@@ -134,49 +248,689 @@ def divide_texto(texto, key):
     return colunas
 
 
-def analise_frequencia(bloco):
+def matriz_pontuacao(bloco, idioma="pt"):
+    """
+    Pré-calcula, uma única vez por ciphertext, a pontuação de cada par e de cada trio de colunas vizinhas.
+    Com as colunas i, j e l lidas nessa ordem, cada linha da matriz forma o bigrama i+j e o trigrama i+j+l,
+    então a pontuação de uma permutação é só a soma das pontuações das suas colunas vizinhas.
+    As pontuações vêm do modelo de linguagem, descontando a frequência de cada letra isolada: assim a posição
+    de uma coluna na borda da matriz não pesa, já que os n-gramas que atravessam o fim de uma linha não são contados.
+
+    Parâmetros:
+    - bloco: uma lista com o ciphertext dividido em colunas.
+    - idioma: o idioma do modelo de linguagem.
+
+    Retorna:
+    - bi: matriz em que bi[i][j] é a soma, sobre as linhas, de log P(ab) - log P(a) - log P(b), com a na coluna i e b na j.
+    - tri: matriz em que tri[i][j][l] é a soma do que os trigramas das colunas i, j e l acrescentam aos seus bigramas.
+    """
+
+    lm = modelo(idioma)
+    colunas = range(len(bloco))
+    cod = [codigos(coluna, alinhado=True) for coluna in bloco]
+    bi = [[0.0] * len(bloco) for _ in colunas]
+    tri = [[[0.0] * len(bloco) for _ in colunas] for _ in colunas]
+
+    for i in colunas:
+        for j in colunas:
+            if i == j:
+                continue
+            pares = [a * 26 + b for a, b in zip(cod[i], cod[j])]
+            bi[i][j] = sum(lm.bi[par] - lm.mono[par // 26] - lm.mono[par % 26] for par in pares)
+            for l in colunas:
+                if l != i and l != j:
+                    tri[i][j][l] = sum(lm.tri[par * 26 + c] - lm.bi[par] - lm.bi[par % 26 * 26 + c] + lm.mono[par % 26]
+                                       for par, c in zip(pares, cod[l]))
+    return bi, tri
+
+
+def pontua_ordem(ordem, bi, tri, inicio=0, fim=None):
+    """
+    Soma as pontuações das colunas vizinhas de uma ordenação, ou de um trecho dela.
+
+    Parâmetros:
+    - ordem: os índices das colunas, na ordem de leitura.
+    - bi: a matriz de pares de matriz_pontuacao.
+    - tri: a matriz de trios de matriz_pontuacao.
+    - inicio: primeira posição do trecho pontuado.
+    - fim: última posição do trecho pontuado (por padrão, o fim da ordenação).
+
+    Retorna:
+    - score: a soma dos pares e trios que começam dentro do trecho.
+    """
+
+    if fim is None:
+        fim = len(ordem) - 1
+    inicio = max(inicio, 0)
+    score = 0
+    for t in range(inicio, min(fim + 1, len(ordem) - 1)):
+        score += bi[ordem[t]][ordem[t + 1]]
+        if t + 2 < len(ordem):
+            score += tri[ordem[t]][ordem[t + 1]][ordem[t + 2]]
+    return score
+
+
+def analise_frequencia(bloco, estatisticas=None, crib=None):
     """
     Recebe o texto dividido em blocos e analisa todas as possíveis permutações.
     Analisa a frequência de bigramas e trigramas para escolher a melhor permutação.
+    As permutações são montadas coluna por coluna, somando a pontuação de cada nova coluna vizinha,
+    e os ramos que não podem superar a melhor pontuação já encontrada são descartados.
 
     Parâmetros:
     - bloco: uma lista com o ciphertext dividido em itens
+    - estatisticas: um instrumentacao.Estatisticas, para contar as permutações e medir as etapas (opcional).
+    - crib: um trecho que a mensagem original contém; os ramos que não podem formá-lo são descartados (opcional).
 
     Retorna:
     - melhor_permutação: permutação com a maior quantidade de bigrafos e trigrafos
+      (None se nenhuma permutação forma o crib).
+    """
+
+    colunas = len(bloco)
+    if colunas < 2:
+        return tuple(bloco)
+
+    restricao = None
+    if crib is not None:
+        crib = crib.replace(" ", "").upper() or None
+    if crib is not None:
+        with etapa(estatisticas, "crib"):
+            restricao = restricao_crib([coluna.upper() for coluna in bloco], crib)
+        if not restricao[1]:
+            if estatisticas is not None:
+                estatisticas.conta("espaco", math.factorial(colunas))
+                estatisticas.conta("podados_crib", math.factorial(colunas))
+            return None
+
+    if estatisticas is not None:
+        estatisticas.conta("bytes", sum(map(len, bloco)))
+    with etapa(estatisticas, "pontuacao"):
+        bi, tri = matriz_pontuacao(bloco)
+    with etapa(estatisticas, "busca"):
+        _, ordem = busca_exaustiva(bi, tri, estatisticas=estatisticas, restricao=restricao)
+    if ordem is None:
+        return None
+    return tuple(bloco[i] for i in ordem)
+
+
+def restricao_crib(bloco, crib):
+    """
+    Prepara a busca exaustiva para descartar as ordenações de colunas que não podem formar um crib.
+    Cada posição em que o crib pode começar na mensagem é um bit; para cada posição t da ordenação e cada coluna j,
+    uma máscara marca os começos em que as letras do crib que caem na posição t das linhas batem com as da coluna j.
+    Ao montar a ordenação, os começos ainda possíveis são a interseção das máscaras das colunas escolhidas.
+
+    Parâmetros:
+    - bloco: uma lista com o ciphertext dividido em colunas, todas do mesmo tamanho.
+    - crib: o trecho conhecido, sem espaços e em maiúsculas (vazio não restringe nada).
+
+    Retorna:
+    - mascaras: mascaras[t][j] é o conjunto de começos compatíveis com a coluna j na posição t.
+    - vivos: o conjunto de todos os começos (0 se o crib não cabe na mensagem).
+    """
+
+    colunas, linhas = len(bloco), len(bloco[0])
+    if not crib:
+        # Um único começo, compatível com todas as colunas em todas as posições.
+        return [[1] * colunas for _ in range(colunas)], 1
+    comecos = colunas * linhas - len(crib) + 1
+    mascaras = [[0] * colunas for _ in range(colunas)]
+    livres = [0] * colunas
+    if comecos <= 0:
+        return mascaras, 0
+
+    # As letras do crib que caem em cada posição das linhas só dependem do começo módulo colunas.
+    exigencias = []
+    for resto in range(colunas):
+        por_posicao = [[] for _ in range(colunas)]
+        for q, letra in enumerate(crib):
+            linha, posicao = divmod(resto + q, colunas)
+            por_posicao[posicao].append((linha, letra))
+        exigencias.append(por_posicao)
+
+    for inicio in range(comecos):
+        bit = 1 << inicio
+        base, resto = divmod(inicio, colunas)
+        for t, exigidas in enumerate(exigencias[resto]):
+            if not exigidas:
+                livres[t] |= bit
+                continue
+            for j, coluna in enumerate(bloco):
+                if all(coluna[base + linha] == letra for linha, letra in exigidas):
+                    mascaras[t][j] |= bit
+
+    for t in range(colunas):
+        for j in range(colunas):
+            mascaras[t][j] |= livres[t]
+    return mascaras, (1 << comecos) - 1
+
+
+def busca_exaustiva(bi, tri, prefixo=(), parar=None, compartilhado=None, estatisticas=None, restricao=None):
+    """
+    Busca em profundidade, com descarte de ramos, a melhor ordenação de colunas que começa por um prefixo.
+    Cada prefixo é uma parte independente do espaço de permutações, o que permite dividir a busca entre processos.
+
+    Parâmetros:
+    - bi: a matriz de pares de matriz_pontuacao.
+    - tri: a matriz de trios de matriz_pontuacao.
+    - prefixo: as primeiras colunas da ordenação (por padrão, nenhuma: a busca cobre todas as permutações).
+    - parar: uma função sem parâmetros; quando ela retorna True, a busca para e retorna a melhor ordenação encontrada até ali.
+    - compartilhado: um multiprocessing.Value com a melhor pontuação entre todos os processos,
+      usada para descartar ramos e atualizada quando este processo a supera.
+    - estatisticas: um instrumentacao.Estatisticas (opcional).
+    - restricao: o par (mascaras, vivos) de restricao_crib; as ordenações que não formam o crib são descartadas
+      antes de serem pontuadas (opcional).
+
+    Retorna:
+    - score: a pontuação da melhor ordenação encontrada (-inf se nenhuma superou a do compartilhado).
+    - ordem: a melhor ordenação encontrada, ou None.
+    """
+
+    colunas = len(bi)
+    # Maior pontuação que uma nova coluna pode somar, usada para descartar ramos.
+    passo_maximo = max(map(max, bi)) + max(max(map(max, linha)) for linha in tri)
+    ordem = list(prefixo) + [0] * (colunas - len(prefixo))
+    melhor = [-math.inf, None]
+    limite = [compartilhado.value if compartilhado is not None else -math.inf]
+    # Nós visitados, ordenações completas e ramos descartados.
+    nos, completas, descartados = [0], [0], [0]
+    mascaras, vivos = restricao if restricao is not None else (None, 0)
+    # Ordenações completas descartadas pelo crib, e quantas ordenações completas cabem abaixo de cada profundidade.
+    podadas = [0]
+    abaixo = [math.factorial(colunas - profundidade - 1) for profundidade in range(colunas)]
+
+    def sincroniza():
+        # A cada poucos milhares de nós, lê a melhor pontuação dos outros processos e confere se deve parar.
+        if compartilhado is not None:
+            limite[0] = max(limite[0], compartilhado.value)
+        if parar is not None and parar():
+            raise TimeoutError
+        if estatisticas is not None:
+            estatisticas.avisa()
+
+    def estende(profundidade, usados, score, vivos):
+        nos[0] += 1
+        if not nos[0] & 4095:
+            sincroniza()
+        if profundidade == colunas:
+            completas[0] += 1
+            if score > limite[0]:
+                limite[0] = melhor[0] = score
+                melhor[1] = list(ordem)
+                if estatisticas is not None:
+                    estatisticas.melhora(score)
+            return
+        if score + (colunas - profundidade) * passo_maximo <= limite[0]:
+            descartados[0] += 1
+            return
+        anterior = ordem[profundidade - 1]
+        pares = bi[anterior]
+        trios = tri[ordem[profundidade - 2]][anterior] if profundidade >= 2 else None
+        for j in range(colunas):
+            if not usados & (1 << j):
+                restantes = vivos
+                if mascaras is not None:
+                    restantes &= mascaras[profundidade][j]
+                    if not restantes:
+                        podadas[0] += abaixo[profundidade]
+                        continue
+                ordem[profundidade] = j
+                ganho = pares[j] + trios[j] if trios else pares[j]
+                estende(profundidade + 1, usados | (1 << j), score + ganho, restantes)
+
+    try:
+        if prefixo:
+            usados = 0
+            for t, i in enumerate(prefixo):
+                usados |= 1 << i
+                if mascaras is not None:
+                    vivos &= mascaras[t][i]
+            if mascaras is None or vivos:
+                estende(len(prefixo), usados, pontua_ordem(prefixo, bi, tri), vivos)
+            else:
+                podadas[0] += math.factorial(colunas - len(prefixo))
+        else:
+            for i in range(colunas):
+                if mascaras is not None and not vivos & mascaras[0][i]:
+                    podadas[0] += abaixo[0]
+                    continue
+                ordem[0] = i
+                estende(1, 1 << i, 0, vivos & mascaras[0][i] if mascaras is not None else vivos)
+    except TimeoutError:
+        pass
+
+    if estatisticas is not None:
+        estatisticas.conta("gerados", nos[0])
+        estatisticas.conta("pontuados", completas[0])
+        estatisticas.conta("descartados", descartados[0])
+        if mascaras is not None:
+            estatisticas.conta("espaco", math.factorial(colunas - len(prefixo)))
+            estatisticas.conta("podados_crib", podadas[0])
+    if compartilhado is not None and melhor[1] is not None:
+        with compartilhado.get_lock():
+            if melhor[0] > compartilhado.value:
+                compartilhado.value = melhor[0]
+    return melhor[0], melhor[1]
+
+
+def vizinho(ordem, sorteio):
+    """
+    Gera uma ordenação vizinha, trocando duas colunas, invertendo um trecho ou movendo uma coluna.
+
+    Parâmetros:
+    - ordem: a ordenação atual.
+    - sorteio: o gerador de números aleatórios.
+
+    Retorna:
+    - nova: uma nova lista com a ordenação vizinha.
+    - i, j: o trecho da ordenação que mudou.
+    """
+
+    nova = list(ordem)
+    i, j = sorted(sorteio.sample(range(len(nova)), 2))
+    movimento = sorteio.randrange(3)
+    if movimento == 0:
+        nova[i], nova[j] = nova[j], nova[i]
+    elif movimento == 1:
+        nova[i:j + 1] = reversed(nova[i:j + 1])
+    else:
+        nova.insert(j, nova.pop(i))
+    return nova, i, j
+
+
+def busca_heuristica(bloco, metodo="tempera", reinicios=10, max_candidatos=20000, tempo_limite=None,
+                     largura=100, semente=None, estatisticas=None):
+    """
+    Procura a melhor permutação de colunas sem testar todas, para chaves grandes demais para a busca exaustiva.
+    As permutações vizinhas são pontuadas de forma incremental: só os pares e trios do trecho que mudou são recalculados.
+
+    Métodos:
+    - "subida": subida de encosta, aceitando só vizinhos melhores, com reinícios aleatórios.
+    - "tempera": têmpera simulada, aceitando vizinhos piores com probabilidade que cai com a temperatura, com reinícios.
+    - "feixe": busca em feixe, montando a ordenação coluna por coluna pela adjacência entre colunas.
+
+    Parâmetros:
+    - bloco: uma lista com o ciphertext dividido em colunas.
+    - metodo: "subida", "tempera" ou "feixe".
+    - reinicios: quantas vezes a busca recomeça de uma ordenação aleatória.
+    - max_candidatos: máximo de permutações pontuadas.
+    - tempo_limite: tempo máximo de busca, em segundos.
+    - largura: quantas ordenações parciais a busca em feixe mantém.
+    - semente: semente do gerador aleatório, para resultados reproduzíveis.
+    - estatisticas: um instrumentacao.Estatisticas, para contar as permutações e medir as etapas (opcional).
+
+    Retorna:
+    - melhor_permutacao: a permutação de colunas com a maior pontuação encontrada.
+    """
+
+    sorteio = random.Random(semente)
+    fim = time.monotonic() + tempo_limite if tempo_limite is not None else None
+    colunas = len(bloco)
+    visitados = 0
+
+    def esgotou():
+        return visitados >= max_candidatos or (fim is not None and time.monotonic() >= fim)
+
+    if colunas < 2:
+        return tuple(bloco)
+
+    if estatisticas is not None:
+        estatisticas.conta("bytes", sum(map(len, bloco)))
+    with etapa(estatisticas, "pontuacao"):
+        bi, tri = matriz_pontuacao(bloco)
+
+    if metodo == "feixe":
+        feixe = [(0, [i]) for i in range(colunas)]
+        for _ in range(colunas - 1):
+            expandido = []
+            for score, ordem in feixe:
+                for j in range(colunas):
+                    if j not in ordem:
+                        ganho = bi[ordem[-1]][j] + (tri[ordem[-2]][ordem[-1]][j] if len(ordem) > 1 else 0)
+                        expandido.append((score + ganho, ordem + [j]))
+            expandido.sort(key=lambda x: x[0], reverse=True)
+            feixe = expandido[:largura]
+            if estatisticas is not None:
+                estatisticas.conta("gerados", len(expandido))
+                estatisticas.conta("descartados", len(expandido) - len(feixe))
+        if estatisticas is not None:
+            estatisticas.conta("pontuados", len(feixe))
+            estatisticas.melhora(feixe[0][0])
+        return tuple(bloco[i] for i in feixe[0][1])
+
+    if metodo not in ("subida", "tempera"):
+        raise ValueError(f"Método de busca desconhecido: {metodo}")
+
+    melhor_ordem = list(range(colunas))
+    melhor_score = pontua_ordem(melhor_ordem, bi, tri)
+    passos = max(max_candidatos // max(reinicios, 1), 1)
+
+    with etapa(estatisticas, "busca"):
+        for _ in range(max(reinicios, 1)):
+            if esgotou():
+                break
+            ordem = list(range(colunas))
+            sorteio.shuffle(ordem)
+            visitados += 1
+            score, ordem, contados = rodada(ordem, bi, tri, metodo, passos, sorteio,
+                                            limite=max_candidatos - visitados, parar=esgotou)
+            visitados += contados
+            if score > melhor_score:
+                melhor_ordem, melhor_score = ordem, score
+            if estatisticas is not None:
+                estatisticas.melhora(melhor_score)
+                estatisticas.avisa()
+
+    if estatisticas is not None:
+        estatisticas.conta("gerados", visitados)
+        estatisticas.conta("pontuados", visitados)
+    return tuple(bloco[i] for i in melhor_ordem)
+
+
+def rodada(ordem, bi, tri, metodo, passos, sorteio, limite=None, parar=None):
+    """
+    Uma rodada de subida de encosta ou de têmpera simulada, a partir de uma ordenação.
+
+    Parâmetros:
+    - ordem: a ordenação inicial.
+    - bi: a matriz de pares de matriz_pontuacao.
+    - tri: a matriz de trios de matriz_pontuacao.
+    - metodo: "subida" ou "tempera".
+    - passos: quantos vizinhos a rodada testa; a temperatura cai ao longo desses passos.
+    - sorteio: o gerador de números aleatórios.
+    - limite: máximo de vizinhos testados, se menor que passos.
+    - parar: uma função sem parâmetros; quando ela retorna True, a rodada para.
+
+    Retorna:
+    - score: a maior pontuação encontrada na rodada.
+    - melhor_ordem: a ordenação com essa pontuação.
+    - visitados: quantos vizinhos foram pontuados.
+    """
+
+    score = pontua_ordem(ordem, bi, tri)
+    melhor_ordem, melhor_score = ordem, score
+    temperatura = max(abs(score) / (10 * len(ordem)), 1.0)
+    resfriamento = 0.01 ** (1 / passos)
+    visitados = 0
+
+    for _ in range(passos if limite is None else min(passos, limite)):
+        if parar is not None and parar():
+            break
+        nova, i, j = vizinho(ordem, sorteio)
+        # Só os pares e trios que tocam o trecho [i, j] mudam.
+        diferenca = pontua_ordem(nova, bi, tri, i - 2, j) - pontua_ordem(ordem, bi, tri, i - 2, j)
+        visitados += 1
+        if diferenca > 0 or (metodo == "tempera" and sorteio.random() < math.exp(diferenca / temperatura)):
+            ordem, score = nova, score + diferenca
+            if score > melhor_score:
+                melhor_ordem, melhor_score = ordem, score
+        temperatura *= resfriamento
+
+    return melhor_score, melhor_ordem, visitados
+
+
+matrizes_processo = {}                                                                 # matrizes de pontuação de cada tamanho de chave, por processo
+melhores_processo = {}                                                                 # melhor pontuação de cada tamanho de chave, compartilhada entre os processos
+prazo_processo = None                                                                  # instante, compartilhado, em que as buscas param
+cancelar_processo = None                                                               # evento de cancelamento, quando a busca roda no processo atual
+
+
+def inicia_processo(matrizes, melhores, prazo, cancelar=None):
+    """
+    Guarda no processo as matrizes de pontuação e as melhores pontuações compartilhadas,
+    para que elas não sejam enviadas a cada tarefa.
+
+    Parâmetros:
+    - matrizes: um dicionário com o par (bi, tri) de cada tamanho de chave.
+    - melhores: um dicionário com um multiprocessing.Value por tamanho de chave.
+    - prazo: um multiprocessing.Value com o instante (time.monotonic) em que as buscas param.
+    - cancelar: um threading.Event que também encerra as buscas, quando elas rodam no processo atual.
     """
-    bi_comum = ["AR", "AN", "AO", "AR", "AD", "AC", "EM", "ES", "EN", "ER", "DA", "DE",
-                "DO", "ON", "OR", "OS", "CA", "CO", "RA", "RE", "TA", "TE", "MA", "NT",
-                "SE", "AL", "IA", "IS", "ME", "NA", "OD", "RI", "RO", "SA", "ST", "UE"]
-    tri_comum = ["QUE", "ENT", "NTE", "ADO", "ADE", "ODE", "ARA", "EST", "RES", "CON",
-                "COM", "STA", "DOS", "CAO", "PAR", "ACA", "MEN", "SDE", "ICA", "ESE",
-                "ACO", "ADA", "POR", "NTO", "OSE", "DES", "ASE", "ERA", "OES", "UMA",
-                "TRE", "IDA", "DAD", "ANT", "ARE", "ONT", "PRE", "IST", "TER", "AIS"]
 
-    #bi_comum = {"DE", "ES", "AO", "OS", "DA"}
-    #tri_comum = {"QUE", "ENT", "NTE", "EST"}
-    
-    melhor_permutacao = ""
-    melhor_score = 0
+    global matrizes_processo, melhores_processo, prazo_processo, cancelar_processo
+    matrizes_processo, melhores_processo, prazo_processo, cancelar_processo = matrizes, melhores, prazo, cancelar
 
-    for permutacao in permutations(bloco):
-        mensagem = ''.join(''.join(c) for c in zip(*permutacao))
 
-        bigramas = [mensagem[i:i+2] for i in range(len(mensagem) - 1)]
-        trigramas = [mensagem[i:i+3] for i in range(len(mensagem) - 2)]
-        conta_bigramas = Counter(bigramas)
-        conta_trigramas = Counter(trigramas)
+def esgotou_prazo():
+    """
+    Confere se o prazo compartilhado das buscas já passou ou se a busca foi cancelada.
+    """
+
+    if cancelar_processo is not None and cancelar_processo.is_set():
+        return True
+    return time.monotonic() >= prazo_processo.value
+
+
+def busca_prefixo(chave, prefixo):
+    """
+    Busca exaustiva entre as ordenações que começam por um prefixo, descartando ramos
+    pela melhor pontuação já encontrada por qualquer processo.
+
+    Parâmetros:
+    - chave: o tamanho da chave.
+    - prefixo: as primeiras colunas da ordenação.
+
+    Retorna:
+    - chave, score e a melhor ordenação encontrada (None se nenhuma superou a dos outros processos).
+    """
 
-        score_bi = sum(conta_bigramas[bg] for bg in bi_comum)
-        score_tri = sum(conta_trigramas[tg] for tg in tri_comum)
-        score_total = (3 * score_tri) + score_bi
+    bi, tri = matrizes_processo[chave]
+    score, ordem = busca_exaustiva(bi, tri, prefixo, esgotou_prazo, melhores_processo[chave])
+    return chave, score, ordem
 
-        if score_total > melhor_score:
-            score_total = melhor_score
-            melhor_permutacao = permutacao
 
-    return melhor_permutacao      
-           
+def busca_reinicio(chave, metodo, passos, semente):
+    """
+    Uma rodada de busca heurística a partir de uma ordenação aleatória, independente das outras.
+
+    Parâmetros:
+    - chave: o tamanho da chave.
+    - metodo: "subida" ou "tempera".
+    - passos: quantos vizinhos a rodada testa.
+    - semente: semente do gerador aleatório da rodada.
+
+    Retorna:
+    - chave, score e a melhor ordenação encontrada.
+    """
+
+    bi, tri = matrizes_processo[chave]
+    sorteio = random.Random(semente)
+    ordem = list(range(chave))
+    sorteio.shuffle(ordem)
+    score, ordem, _ = rodada(ordem, bi, tri, metodo, passos, sorteio, parar=esgotou_prazo)
+    compartilhado = melhores_processo[chave]
+    with compartilhado.get_lock():
+        if score > compartilhado.value:
+            compartilhado.value = score
+    return chave, score, ordem
+
+
+def quebra_cifra_paralela(ciphertext, max_chave=10, processos=None, tempo_limite=None, limite_exaustivo=8,
+                          metodo="tempera", reinicios=None, max_candidatos=200000, semente=None, cancelar=None):
+    """
+    Decifra uma mensagem criptografada por transposição de colunas, dividindo a busca entre processos.
+    Até limite_exaustivo colunas, o espaço de permutações é dividido pelos dois primeiros índices da ordenação,
+    e os processos compartilham a melhor pontuação de cada tamanho de chave para descartar ramos.
+    Acima disso, cada tarefa é uma rodada independente da busca heurística.
+    A busca pode ser interrompida a qualquer momento (tempo_limite, cancelar ou Ctrl+C): ela retorna
+    a melhor resposta encontrada até ali para cada tamanho de chave.
+
+    Parâmetros:
+    - ciphertext: mensagem cifrada.
+    - max_chave: maior tamanho de chave considerado.
+    - processos: quantos processos usar (por padrão, um por CPU; nunca mais que as tarefas de busca;
+      1 roda tudo no processo atual).
+    - tempo_limite: tempo máximo de busca, em segundos.
+    - limite_exaustivo: maior quantidade de colunas em que a busca exaustiva é usada.
+    - metodo: "subida" ou "tempera", para as chaves acima de limite_exaustivo.
+    - reinicios: quantas rodadas heurísticas por tamanho de chave (por padrão, quatro por processo).
+    - max_candidatos: máximo de permutações pontuadas por tamanho de chave, divididas entre as rodadas.
+    - semente: semente do gerador aleatório, para rodadas reproduzíveis.
+    - cancelar: um threading.Event que, quando ativado, encerra a busca.
+
+    Retorna:
+    - Uma lista de (chave, mensagem, score), da maior pontuação por letra do modelo de linguagem para a menor.
+    """
+
+    if metodo not in ("subida", "tempera"):
+        raise ValueError(f"Método de busca desconhecido: {metodo}")
+
+    ciphertext = ciphertext.letras() if isinstance(ciphertext, Texto) else ciphertext.replace(" ", "")
+    processos = processos or os.cpu_count() or 1
+    reinicios = reinicios or 4 * processos
+    fim = time.monotonic() + tempo_limite if tempo_limite is not None else None
+    sorteio = random.Random(semente)
+
+    blocos = {chave: divide_texto(ciphertext, chave) for chave in acha_divisores(ciphertext, max_chave)}
+    matrizes = {chave: matriz_pontuacao(bloco) for chave, bloco in blocos.items() if chave > 1}
+    melhores = {chave: Value("d", -math.inf) for chave in matrizes}
+    resultados = {chave: (-math.inf, list(range(chave))) for chave in blocos}
+
+    tarefas = []
+    for chave, (bi, tri) in matrizes.items():
+        if chave <= limite_exaustivo:
+            # Os prefixos mais promissores primeiro, para que a poda comece cedo.
+            prefixos = sorted(((i, j) for i in range(chave) for j in range(chave) if i != j),
+                              key=lambda par: bi[par[0]][par[1]], reverse=True)
+            tarefas += [(busca_prefixo, chave, prefixo) for prefixo in prefixos]
+        else:
+            passos = max(max_candidatos // reinicios, 1)
+            tarefas += [(busca_reinicio, chave, metodo, passos, sorteio.randrange(2 ** 32)) for _ in range(reinicios)]
+
+    # Cada tarefa ocupa um processo: além da quantidade de tarefas, os processos ficariam parados.
+    processos = min(processos, max(len(tarefas), 1))
+
+    def registra(chave, score, ordem):
+        if ordem is not None and score > resultados[chave][0]:
+            resultados[chave] = (score, ordem)
+
+    # O prazo é compartilhado para que, ao cancelar, as tarefas em andamento também parem.
+    prazo = Value("d", fim if fim is not None else math.inf)
+    inicia_processo(matrizes, melhores, prazo, cancelar)
+    try:
+        if processos == 1:
+            for funcao, *argumentos in tarefas:
+                if esgotou_prazo():
+                    break
+                registra(*funcao(*argumentos))
+        else:
+            executor = ProcessPoolExecutor(processos, initializer=inicia_processo, initargs=(matrizes, melhores, prazo))
+            try:
+                pendentes = {executor.submit(funcao, *argumentos) for funcao, *argumentos in tarefas}
+                while pendentes and not esgotou_prazo():
+                    restante = None if fim is None else max(fim - time.monotonic(), 0)
+                    if cancelar is not None:
+                        restante = 0.1 if restante is None else min(restante, 0.1)
+                    prontos, pendentes = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registra(*futuro.result())
+                # As tarefas em andamento param pelo prazo e entregam a melhor resposta que já têm.
+                prazo.value = 0
+                for futuro in pendentes:
+                    futuro.cancel()
+                for futuro in wait(pendentes, timeout=1)[0]:
+                    if not futuro.cancelled() and futuro.exception() is None:
+                        registra(*futuro.result())
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+    except KeyboardInterrupt:
+        pass
+
+    lm = modelo("pt")
+    possiveis_respostas = []
+    for chave, (_, ordem) in resultados.items():
+        colunas = [blocos[chave][i] for i in ordem]
+        mensagem = "".join("".join(linha) for linha in zip(*colunas))
+        possiveis_respostas.append((chave, mensagem, lm.pontua_por_letra(mensagem)))
+    possiveis_respostas.sort(key=lambda x: x[2], reverse=True)
+    return possiveis_respostas
+
+
+def junta_colunas(textos, chave):
+    """
+    Divide cada mensagem em colunas e junta a coluna i de todas elas numa única coluna.
+    As linhas de cada mensagem continuam alinhadas, então a matriz_pontuacao do resultado é a soma
+    das matrizes de todas as mensagens, calculada de uma vez.
+
+    Parâmetros:
+    - textos: as mensagens cifradas, sem espaços, com tamanhos múltiplos de chave.
+    - chave: o tamanho da chave.
+
+    Retorna:
+    - bloco: uma lista com as chave colunas de todas as mensagens.
+    """
+
+    divididos = [divide_texto(texto, chave) for texto in textos]
+    return ["".join(colunas[i] for colunas in divididos) for i in range(chave)]
+
+
+def ordem_para_chave(ordem):
+    """
+    Monta uma palavra chave com a ordem de colunas encontrada por uma busca, para usar em decifra e decifra_lote.
+
+    Parâmetros:
+    - ordem: ordem[t] é a coluna do texto cifrado que ocupa a posição t da mensagem.
+
+    Retorna:
+    - key: uma palavra chave em que a letra da posição t é a ordem[t]-ésima do alfabeto.
+    """
+
+    return "".join(chr(ord("A") + coluna) for coluna in ordem)
+
+
+def quebra_conjunta(ciphertexts, max_chave=10, limite_exaustivo=8, metodo="tempera", reinicios=10,
+                    max_candidatos=20000, semente=None):
+    """
+    Decifra várias mensagens cifradas com a mesma chave, somando as evidências de todas elas.
+    Para cada tamanho de chave que divide o tamanho de todas as mensagens, as pontuações de colunas vizinhas
+    de todas as mensagens são somadas numa única matriz (junta_colunas), e a busca roda uma única vez.
+    A ordem encontrada vira uma palavra chave, aplicada a todas as mensagens por decifra_lote.
+    Mensagens curtas demais para serem quebradas sozinhas são quebradas juntas.
+
+    Parâmetros:
+    - ciphertexts: as mensagens cifradas.
+    - max_chave: maior tamanho de chave considerado.
+    - limite_exaustivo: maior quantidade de colunas em que a busca exaustiva é usada.
+    - metodo: "subida" ou "tempera", para as chaves acima de limite_exaustivo.
+    - reinicios: quantas rodadas heurísticas por tamanho de chave.
+    - max_candidatos: máximo de permutações pontuadas por tamanho de chave, divididas entre as rodadas.
+    - semente: semente do gerador aleatório, para rodadas reproduzíveis.
+
+    Retorna:
+    - Uma lista de (chave, key, mensagens, score), da maior pontuação por letra do modelo de linguagem
+      para a menor, em que chave é o tamanho da chave e key uma palavra chave equivalente à original.
+    """
+
+    if metodo not in ("subida", "tempera"):
+        raise ValueError(f"Método de busca desconhecido: {metodo}")
+
+    textos = [ciphertext.letras() if isinstance(ciphertext, Texto) else ciphertext.replace(" ", "") for ciphertext in ciphertexts]
+    sorteio = random.Random(semente)
+    lm = modelo("pt")
+
+    possiveis_respostas = []
+    for chave in range(2, max_chave + 1):
+        if any(len(texto) % chave for texto in textos) or all(len(texto) <= chave for texto in textos):
+            continue
+        bi, tri = matriz_pontuacao(junta_colunas(textos, chave))
+        if chave <= limite_exaustivo:
+            _, ordem = busca_exaustiva(bi, tri)
+        else:
+            passos = max(max_candidatos // reinicios, 1)
+            melhor_score, ordem = -math.inf, list(range(chave))
+            for _ in range(reinicios):
+                inicial = list(range(chave))
+                sorteio.shuffle(inicial)
+                score, inicial, _ = rodada(inicial, bi, tri, metodo, passos, sorteio)
+                if score > melhor_score:
+                    melhor_score, ordem = score, inicial
+        key = ordem_para_chave(ordem)
+        mensagens = decifra_lote(textos, key)
+        possiveis_respostas.append((chave, key, mensagens, lm.pontua_mensagens(mensagens)))
+    possiveis_respostas.sort(key=lambda x: x[3], reverse=True)
+    return possiveis_respostas
+
 
 def main():
     """
@@ -224,6 +978,8 @@ def main():
             case _:
                 print("==============================================================================================================")
                 print("Você deve escolher entre (1), (2) ou (3). Tente novamente!")
-                input("Digite (0) para voltar ao menu: ")    
+                input("Digite (0) para voltar ao menu: ")
+
 
-main()
+if __name__ == "__main__":
+    main()
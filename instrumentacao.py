@@ -0,0 +1,201 @@
+import json
+import time
+from contextlib import nullcontext
+
+
+class Estatisticas:
+    """
+    Contadores, tempos por etapa e evolução da melhor pontuação de uma quebra de cifra.
+    As funções de quebra recebem um objeto destes no parâmetro estatisticas e o preenchem durante a busca;
+    com estatisticas=None (o padrão), nada é medido.
+
+    Contadores:
+    - gerados: candidatos montados (permutações parciais ou completas, quantidades de rails).
+    - pontuados: candidatos completos que receberam uma pontuação.
+    - descartados: ramos da busca descartados sem serem completados.
+    - bytes: bytes de texto processados.
+    - cache_acertos e cache_falhas: consultas aos caches (lru_cache) durante a busca.
+    - espaco e podados_crib: candidatos do espaço de busca e quantos deles foram descartados por um crib
+      (só nas quebras com crib; veja fracao_podada).
+    """
+
+    contadores_padrao = ("gerados", "pontuados", "descartados", "bytes", "cache_acertos", "cache_falhas")
+
+    def __init__(self, nome="", progresso=None, intervalo=1.0):
+        """
+        Parâmetros:
+        - nome: o nome da busca, usado como rótulo na exportação.
+        - progresso: uma função chamada com este objeto a cada nova melhor pontuação
+          e, durante a busca, a cada intervalo segundos.
+        - intervalo: intervalo mínimo entre as chamadas periódicas de progresso, em segundos.
+        """
+
+        self.nome = nome
+        self.progresso = progresso
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self.ultimo_aviso = self.inicio
+        self.contadores = dict.fromkeys(self.contadores_padrao, 0)
+        self.tempos = {}
+        self.melhor = None
+        self.historico = []
+
+    def conta(self, nome, quantidade=1):
+        """
+        Soma uma quantidade a um contador.
+        """
+
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def etapa(self, nome):
+        """
+        Mede o tempo de uma etapa da busca, somando-o ao tempo já registrado para ela.
+        Uso: with estatisticas.etapa("pontuacao"): ...
+        """
+
+        return _Etapa(self, nome)
+
+    def soma_tempo(self, nome, segundos):
+        """
+        Soma um tempo medido fora do processo, como o de um processo do ProcessPoolExecutor, a uma etapa.
+        """
+
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+
+    def cache(self, funcao):
+        """
+        Conta os acertos e falhas de um lru_cache durante um trecho da busca.
+        Uso: with estatisticas.cache(trilhos): ...
+        """
+
+        return _Cache(self, funcao)
+
+    def melhora(self, score):
+        """
+        Registra uma pontuação, guardando-a no histórico se for a melhor até agora.
+        """
+
+        if self.melhor is None or score > self.melhor:
+            self.melhor = score
+            self.historico.append((time.perf_counter() - self.inicio, score))
+            if self.progresso is not None:
+                self.progresso(self)
+
+    def avisa(self):
+        """
+        Chama a função de progresso, se o intervalo desde o último aviso já passou.
+        As buscas chamam este método de tempos em tempos, não a cada candidato.
+        """
+
+        agora = time.perf_counter()
+        if self.progresso is not None and agora - self.ultimo_aviso >= self.intervalo:
+            self.ultimo_aviso = agora
+            self.progresso(self)
+
+    def fracao_podada(self):
+        """
+        Retorna a fração do espaço de busca descartada por um crib, ou None se a quebra não usou crib.
+        """
+
+        espaco = self.contadores.get("espaco", 0)
+        return self.contadores.get("podados_crib", 0) / espaco if espaco else None
+
+    def como_dict(self):
+        """
+        Retorna as estatísticas como um dicionário, pronto para ser convertido em JSON.
+        """
+
+        return {
+            "nome": self.nome,
+            "segundos": time.perf_counter() - self.inicio,
+            "contadores": dict(self.contadores),
+            "tempos": dict(self.tempos),
+            "melhor": self.melhor,
+            "fracao_podada": self.fracao_podada(),
+            "historico": [list(ponto) for ponto in self.historico],
+        }
+
+    def json(self):
+        """
+        Retorna as estatísticas em JSON.
+        """
+
+        return json.dumps(self.como_dict(), ensure_ascii=False)
+
+    def prometheus(self, prefixo="cifras"):
+        """
+        Retorna as estatísticas no formato de texto do Prometheus.
+
+        Parâmetros:
+        - prefixo: o prefixo dos nomes das métricas.
+        """
+
+        rotulo = f'busca="{self.nome}"'
+        linhas = []
+        for nome, valor in self.contadores.items():
+            linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+            linhas.append(f"{prefixo}_{nome}_total{{{rotulo}}} {valor}")
+        linhas.append(f"# TYPE {prefixo}_etapa_segundos_total counter")
+        for nome, segundos in self.tempos.items():
+            linhas.append(f'{prefixo}_etapa_segundos_total{{{rotulo},etapa="{nome}"}} {segundos:.6f}')
+        if self.melhor is not None:
+            linhas.append(f"# TYPE {prefixo}_melhor_score gauge")
+            linhas.append(f"{prefixo}_melhor_score{{{rotulo}}} {self.melhor}")
+        return "\n".join(linhas) + "\n"
+
+
+def etapa(estatisticas, nome):
+    """
+    Mede uma etapa se houver estatísticas; caso contrário, não faz nada.
+    Uso: with etapa(estatisticas, "busca"): ...
+    """
+
+    return nullcontext() if estatisticas is None else estatisticas.etapa(nome)
+
+
+def mede_cache(estatisticas, funcao):
+    """
+    Conta os acertos de um lru_cache se houver estatísticas; caso contrário, não faz nada.
+    """
+
+    return nullcontext() if estatisticas is None else estatisticas.cache(funcao)
+
+
+class _Etapa:
+    """
+    Gerenciador de contexto de Estatisticas.etapa.
+    """
+
+    __slots__ = ("estatisticas", "nome", "inicio")
+
+    def __init__(self, estatisticas, nome):
+        self.estatisticas = estatisticas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        self.estatisticas.soma_tempo(self.nome, time.perf_counter() - self.inicio)
+
+
+class _Cache:
+    """
+    Gerenciador de contexto de Estatisticas.cache.
+    """
+
+    __slots__ = ("estatisticas", "funcao", "antes")
+
+    def __init__(self, estatisticas, funcao):
+        self.estatisticas = estatisticas
+        self.funcao = funcao
+
+    def __enter__(self):
+        self.antes = self.funcao.cache_info()
+        return self
+
+    def __exit__(self, *erro):
+        depois = self.funcao.cache_info()
+        self.estatisticas.conta("cache_acertos", depois.hits - self.antes.hits)
+        self.estatisticas.conta("cache_falhas", depois.misses - self.antes.misses)
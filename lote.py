@@ -0,0 +1,185 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+modulos = {"shift": "shift_cipher", "rail": "rail_fence", "colunar": "columnar_transposition"}   # módulo de cada cifra, importado só quando usado
+carregados = {}                                                                                  # módulos já importados neste processo
+
+
+def cifra_modulo(cifra):
+    """
+    Importa o módulo de uma cifra na primeira vez que ele é usado.
+
+    Parâmetros:
+    - cifra: "shift", "rail" ou "colunar".
+
+    Retorna:
+    - o módulo da cifra.
+    """
+
+    if cifra not in carregados:
+        if cifra not in modulos:
+            raise ValueError(f"Cifra desconhecida: {cifra}")
+        carregados[cifra] = importlib.import_module(modulos[cifra])
+    return carregados[cifra]
+
+
+def executa(tarefa):
+    """
+    Executa uma tarefa de cifra, decifra ou quebra.
+
+    Parâmetros:
+    - tarefa: um dicionário com "cipher" ("shift", "rail" ou "colunar"), "operation" ("cifra", "decifra" ou "quebra"),
+      "key" e "text". Na quebra, "key" é opcional e limita o tamanho das chaves testadas,
+      e "tempo_limite" (opcional) limita o tempo de busca das transposições, em segundos.
+
+    Retorna:
+    - o resultado da operação: o texto cifrado ou decifrado, ou a lista de candidatos da quebra.
+    """
+
+    cifra, operacao = tarefa["cipher"], tarefa["operation"]
+    texto, chave = tarefa["text"], tarefa.get("key")
+    tempo_limite = tarefa.get("tempo_limite")
+    modulo = cifra_modulo(cifra)
+
+    match cifra, operacao:
+        case "shift", "cifra":
+            return modulo.shift_cipher(texto, int(chave))
+        case "shift", "decifra":
+            return modulo.decifra(texto, int(chave))
+        case "shift", "quebra":
+            return modulo.distribuicao_frequencia(texto)
+        case "rail", "cifra":
+            return modulo.rail_fence(texto, int(chave))
+        case "rail", "decifra":
+            return modulo.decifra(texto.replace(" ", "").upper(), int(chave))
+        case "rail", "quebra":
+            return modulo.quebra_cifra_ranqueada(texto, int(chave or 10) + 1, processos=1, tempo_limite=tempo_limite)
+        case "colunar", "cifra":
+            return modulo.transposition_cipher(texto, chave)
+        case "colunar", "decifra":
+            return modulo.decifra(texto, chave)
+        case "colunar", "quebra":
+            return modulo.quebra_cifra_paralela(texto, int(chave or 10), processos=1, tempo_limite=tempo_limite)
+    raise ValueError(f"Operação desconhecida: {operacao}")
+
+
+def executa_linhas(linhas, inicio=0):
+    """
+    Executa um bloco de tarefas NDJSON. Um erro em uma tarefa vira uma resposta de erro, sem interromper as outras.
+
+    Parâmetros:
+    - linhas: as linhas JSON do bloco.
+    - inicio: o número da primeira linha, usado como id das tarefas que não têm um.
+
+    Retorna:
+    - respostas: uma linha JSON de resposta para cada tarefa, na mesma ordem.
+    """
+
+    respostas = []
+    for numero, linha in enumerate(linhas, inicio):
+        identificador = numero
+        try:
+            tarefa = json.loads(linha)
+            identificador = tarefa.get("id", numero)
+            resposta = {"id": identificador, "resultado": executa(tarefa)}
+        except Exception as erro:
+            resposta = {"id": identificador, "erro": f"{type(erro).__name__}: {erro}"}
+        respostas.append(json.dumps(resposta, ensure_ascii=False))
+    return respostas
+
+
+def le_blocos(entradas, tamanho_bloco):
+    """
+    Lê as linhas das entradas e as agrupa em blocos, sem carregar as entradas inteiras na memória.
+
+    Parâmetros:
+    - entradas: arquivos abertos para leitura.
+    - tamanho_bloco: quantas tarefas por bloco.
+
+    Retorna:
+    - um gerador de (numero da primeira linha, linhas do bloco).
+    """
+
+    bloco, inicio, numero = [], 0, 0
+    for entrada in entradas:
+        for linha in entrada:
+            if linha.strip():
+                bloco.append(linha)
+                numero += 1
+                if len(bloco) == tamanho_bloco:
+                    yield inicio, bloco
+                    bloco, inicio = [], numero
+    if bloco:
+        yield inicio, bloco
+
+
+def processa(entradas, saida, processos=None, tamanho_bloco=256):
+    """
+    Executa as tarefas NDJSON das entradas e escreve as respostas NDJSON na saída, na ordem das tarefas.
+    Os blocos são distribuídos entre processos, com um número limitado de blocos pendentes,
+    para que milhões de tarefas passem por um único processo de longa duração com memória constante.
+
+    Parâmetros:
+    - entradas: arquivos abertos para leitura, com uma tarefa JSON por linha.
+    - saida: arquivo aberto para escrita.
+    - processos: quantos processos usar (por padrão, um por CPU; 1 roda tudo no processo atual).
+    - tamanho_bloco: quantas tarefas cada processo recebe de uma vez.
+
+    Retorna:
+    - total: quantas tarefas foram processadas.
+    """
+
+    processos = processos or os.cpu_count() or 1
+    total = 0
+
+    def escreve(respostas):
+        saida.write("\n".join(respostas) + "\n")
+        saida.flush()
+
+    if processos == 1:
+        for inicio, bloco in le_blocos(entradas, tamanho_bloco):
+            escreve(executa_linhas(bloco, inicio))
+            total += len(bloco)
+        return total
+
+    with ProcessPoolExecutor(processos) as executor:
+        pendentes = deque()
+        for inicio, bloco in le_blocos(entradas, tamanho_bloco):
+            pendentes.append(executor.submit(executa_linhas, bloco, inicio))
+            total += len(bloco)
+            # Poucos blocos à frente de cada processo: a leitura espera a escrita, e a ordem das respostas é mantida.
+            if len(pendentes) >= 4 * processos:
+                escreve(pendentes.popleft().result())
+        while pendentes:
+            escreve(pendentes.popleft().result())
+    return total
+
+
+def main():
+    """
+    Lê tarefas NDJSON da entrada padrão ou de arquivos e escreve as respostas NDJSON na saída padrão.
+    Exemplo: echo '{"cipher": "rail", "operation": "cifra", "key": 3, "text": "ola mundo"}' | python lote.py
+    """
+
+    parser = argparse.ArgumentParser(prog="lote.py", description="Executa tarefas de cifras em lote, em formato NDJSON.")
+    parser.add_argument("arquivos", nargs="*", help="arquivos com uma tarefa JSON por linha (por padrão, a entrada padrão)")
+    parser.add_argument("--processos", type=int, default=None, help="quantidade de processos (por padrão, um por CPU)")
+    parser.add_argument("--tamanho-bloco", type=int, default=256, help="tarefas enviadas a cada processo de uma vez")
+    args = parser.parse_args()
+
+    entradas = [sys.stdin if nome == "-" else open(nome, encoding="utf-8") for nome in args.arquivos or ["-"]]
+    try:
+        processa(entradas, sys.stdout, args.processos, args.tamanho_bloco)
+    finally:
+        for entrada in entradas:
+            if entrada is not sys.stdin:
+                entrada.close()
+
+
+if __name__ == "__main__":
+    main()
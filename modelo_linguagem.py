@@ -0,0 +1,363 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+frequencias_portugues = {'A': 14.63, 'B': 1.04, 'C': 3.88, 'D': 4.99, 'E': 12.57, 'F': 1.02, 'G': 1.30,       # frequência (%) de cada letra no português
+                         'H': 1.28, 'I': 6.18, 'J': 0.40, 'K': 0.02, 'L': 2.78, 'M': 4.74, 'N': 5.05,
+                         'O': 10.73, 'P': 2.52, 'Q': 1.20, 'R': 6.53, 'S': 7.81, 'T': 4.34, 'U': 4.63,
+                         'V': 1.67, 'W': 0.01, 'X': 0.21, 'Y': 0.01, 'Z': 0.47}
+frequencias_ingles = {'A': 8.17, 'B': 1.49, 'C': 2.78, 'D': 4.25, 'E': 12.70, 'F': 2.23, 'G': 2.02,           # frequência (%) de cada letra no inglês
+                      'H': 6.09, 'I': 6.97, 'J': 0.15, 'K': 0.77, 'L': 4.03, 'M': 2.41, 'N': 6.75,
+                      'O': 7.51, 'P': 1.93, 'Q': 0.10, 'R': 5.99, 'S': 6.33, 'T': 9.06, 'U': 2.76,
+                      'V': 0.98, 'W': 2.36, 'X': 0.15, 'Y': 1.97, 'Z': 0.07}
+
+bigramas_comuns = {"pt": ("AR", "AN", "AO", "AD", "AC", "EM", "ES", "EN", "ER", "DA", "DE", "DO",      # bigramas mais comuns de cada idioma
+                          "ON", "OR", "OS", "CA", "CO", "RA", "RE", "TA", "TE", "MA", "NT", "SE",
+                          "AL", "IA", "IS", "ME", "NA", "OD", "RI", "RO", "SA", "ST", "UE"),
+                   "en": ("TH", "HE", "IN", "ER", "AN", "RE", "ND", "ON", "EN", "AT", "OU", "ED",
+                          "HA", "TO", "OR", "IT", "IS", "HI", "ES", "NG", "ST", "AR", "TE", "SE")}
+trigramas_comuns = {"pt": ("QUE", "ENT", "NTE", "ADO", "ADE", "ODE", "ARA", "EST", "RES", "CON",     # trigramas mais comuns de cada idioma
+                           "COM", "STA", "DOS", "CAO", "PAR", "ACA", "MEN", "SDE", "ICA", "ESE",
+                           "ACO", "ADA", "POR", "NTO", "OSE", "DES", "ASE", "ERA", "OES", "UMA",
+                           "TRE", "IDA", "DAD", "ANT", "ARE", "ONT", "PRE", "IST", "TER", "AIS"),
+                    "en": ("THE", "AND", "ING", "HER", "HAT", "HIS", "THA", "ERE", "FOR", "ENT",
+                           "ION", "TER", "WAS", "YOU", "ITH", "VER", "ALL", "WIT", "THI", "TIO")}
+
+MAGICO = b"CCLM"                                                                        # assinatura dos arquivos de modelo
+VERSAO = 1
+CABECALHO = struct.Struct("<4sB2sx")                                                    # assinatura, versão, idioma e um byte de alinhamento
+TAMANHOS = (26, 26 ** 2, 26 ** 3, 26 ** 4)                                              # quantidade de mono, bi, tri e quadrigramas
+
+letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+tabela_codigos = bytes.maketrans(letras.encode("ascii") + letras.lower().encode("ascii"),   # leva A-Z e a-z nos códigos 0 a 25
+                                 bytes(range(26)) * 2)
+nao_letras = bytes(c for c in range(256) if not (65 <= c <= 90 or 97 <= c <= 122))      # bytes descartados por codigos
+tabela_alinhada = bytes(23 if c in nao_letras else tabela_codigos[c] for c in range(256))   # como tabela_codigos, mas o resto vira X
+
+
+def codigos(texto, alinhado=False):
+    """
+    Converte um texto nos códigos de suas letras, de 0 (A) a 25 (Z).
+    Acentos são removidos (Ç vira C) e os outros caracteres são descartados.
+
+    Parâmetros:
+    - texto: o texto, como str ou bytes.
+    - alinhado: se True, os outros caracteres viram X em vez de serem descartados, mantendo as posições.
+
+    Retorna:
+    - um bytes com um código por letra.
+    """
+
+    if isinstance(texto, str):
+        if not texto.isascii():
+            texto = unicodedata.normalize("NFD", texto)
+            texto = "".join(c for c in texto if not unicodedata.combining(c))
+        texto = texto.encode("ascii", "replace")
+    if alinhado:
+        return texto.translate(tabela_alinhada)
+    return texto.translate(tabela_codigos, nao_letras)
+
+
+def indices_ngramas(cod, ordem, inicio=0):
+    """
+    Percorre os n-gramas de um texto, devolvendo o código de cada um em base 26.
+
+    Parâmetros:
+    - cod: os códigos das letras do texto.
+    - ordem: o tamanho dos n-gramas.
+    - inicio: posição do primeiro n-grama.
+
+    Retorna:
+    - um gerador com o índice de cada n-grama.
+    """
+
+    for ngrama in zip(*(cod[inicio + i:] for i in range(ordem))):
+        indice = 0
+        for c in ngrama:
+            indice = indice * 26 + c
+        yield indice
+
+
+class ModeloLinguagem:
+    """
+    Log-probabilidades (base 10) de mono, bi, tri e quadrigramas de um idioma.
+    Cada tabela é um array indexado pelo código do n-grama em base 26, ou seja, "AB" é 0 * 26 + 1.
+    """
+
+    def __init__(self, idioma, mono, bi, tri, quad, mapa=None):
+        self.idioma = idioma
+        self.mono = mono
+        self.bi = bi
+        self.tri = tri
+        self.quad = quad
+        self.mapa = mapa                                                                 # mmap do arquivo, mantido aberto enquanto o modelo existir
+
+    def pontua(self, texto):
+        """
+        Mede o quanto um texto se parece com o idioma, somando as log-probabilidades dos seus quadrigramas.
+
+        Parâmetros:
+        - texto: o texto, como str ou bytes.
+
+        Retorna:
+        - score: a soma das log-probabilidades (quanto maior, mais provável).
+        """
+
+        return self.pontua_codigos(codigos(texto))
+
+    def pontua_codigos(self, cod):
+        """
+        Como pontua, mas recebe o texto já convertido por codigos.
+
+        Parâmetros:
+        - cod: os códigos das letras do texto.
+
+        Retorna:
+        - score: a soma das log-probabilidades (quanto maior, mais provável).
+        """
+
+        if len(cod) >= 4:
+            quad = self.quad
+            return sum(quad[((a * 26 + b) * 26 + c) * 26 + d] for a, b, c, d in zip(cod, cod[1:], cod[2:], cod[3:]))
+        if len(cod) == 3:
+            return self.tri[(cod[0] * 26 + cod[1]) * 26 + cod[2]]
+        if len(cod) == 2:
+            return self.bi[cod[0] * 26 + cod[1]]
+        return sum(self.mono[c] for c in cod)
+
+    def pontua_por_letra(self, texto):
+        """
+        A pontuação de pontua dividida pela quantidade de quadrigramas, para comparar textos de tamanhos diferentes.
+
+        Parâmetros:
+        - texto: o texto, como str ou bytes.
+
+        Retorna:
+        - a log-probabilidade média por quadrigrama.
+        """
+
+        cod = codigos(texto)
+        return self.pontua_codigos(cod) / max(len(cod) - 3, 1)
+
+    def pontua_mensagens(self, textos):
+        """
+        Como pontua_por_letra, mas para várias mensagens independentes: cada uma é pontuada separadamente,
+        sem os quadrigramas que atravessariam a fronteira entre duas mensagens, e as pontuações são somadas.
+
+        Parâmetros:
+        - textos: as mensagens, como str ou bytes.
+
+        Retorna:
+        - a log-probabilidade média por quadrigrama de todas as mensagens.
+        """
+
+        total, quadrigramas = 0.0, 0
+        for texto in textos:
+            cod = codigos(texto)
+            total += self.pontua_codigos(cod)
+            quadrigramas += max(len(cod) - 3, 1)
+        return total / max(quadrigramas, 1)
+
+    def verossimilhanca_deslocamentos(self, contagem):
+        """
+        Calcula a log-verossimilhança de cada deslocamento a partir do histograma do texto cifrado.
+
+        Parâmetros:
+        - contagem: histograma de 26 posições do texto cifrado.
+
+        Retorna:
+        - scores: lista com 26 posições, a log-verossimilhança de cada deslocamento (quanto maior, melhor).
+        """
+
+        return [sum(quantidade * self.mono[(numero - deslocamento) % 26] for numero, quantidade in enumerate(contagem))
+                for deslocamento in range(26)]
+
+    def assinatura(self):
+        """
+        Identifica o conteúdo do modelo, para que resultados calculados com outro modelo não sejam reaproveitados.
+
+        Retorna:
+        - um hash SHA-256, em hexadecimal, da versão do formato, do idioma e das tabelas.
+        """
+
+        if getattr(self, "_assinatura", None) is None:
+            resumo = hashlib.sha256(CABECALHO.pack(MAGICO, VERSAO, self.idioma.encode("ascii")))
+            for tabela in (self.mono, self.bi, self.tri, self.quad):
+                resumo.update(tabela)
+            self._assinatura = resumo.hexdigest()
+        return self._assinatura
+
+
+def embutido(idioma="pt"):
+    """
+    Monta um modelo a partir das frequências de letras e das listas de bigramas e trigramas comuns,
+    para quando nenhum arquivo treinado estiver disponível.
+    Bigramas e trigramas comuns recebem um bônus e os n-gramas maiores são aproximados por cadeia de Markov.
+
+    Parâmetros:
+    - idioma: "pt" ou "en".
+
+    Retorna:
+    - um ModeloLinguagem.
+    """
+
+    frequencias = {"pt": frequencias_portugues, "en": frequencias_ingles}[idioma]
+    total = sum(frequencias.values())
+    mono = array("f", [math.log10(frequencias[letra] / total) for letra in letras])
+    comuns_bi = {letras.index(a) * 26 + letras.index(b) for a, b in bigramas_comuns[idioma]}
+    comuns_tri = {(letras.index(a) * 26 + letras.index(b)) * 26 + letras.index(c) for a, b, c in trigramas_comuns[idioma]}
+
+    bi = array("f", [mono[a] + mono[b] + (0.7 if a * 26 + b in comuns_bi else 0.0)
+                     for a in range(26) for b in range(26)])
+    tri = array("f", [bi[ab] + bi[ab % 26 * 26 + c] - mono[ab % 26] + (1.0 if ab * 26 + c in comuns_tri else 0.0)
+                      for ab in range(26 ** 2) for c in range(26)])
+    quad = array("f", [tri[abc] + tri[abc % 676 * 26 + d] - bi[abc % 676]
+                       for abc in range(26 ** 3) for d in range(26)])
+    return ModeloLinguagem(idioma, mono, bi, tri, quad)
+
+
+def treina(corpus, destino, idioma="pt"):
+    """
+    Treina as tabelas de n-gramas a partir de arquivos de texto locais e as grava num arquivo binário.
+    Espaços e pontuação são ignorados, já que as cifras também os removem.
+
+    Parâmetros:
+    - corpus: uma lista de caminhos de arquivos de texto (UTF-8).
+    - destino: caminho do arquivo binário gerado.
+    - idioma: código de duas letras do idioma.
+
+    Retorna:
+    - total: quantidade de letras usadas no treino.
+    """
+
+    contagens = [Counter() for _ in TAMANHOS]
+    total = 0
+    for caminho in corpus:
+        with open(caminho, encoding="utf-8", errors="ignore") as arquivo:
+            # As últimas 3 letras de um bloco seguem para o próximo, para não perder os n-gramas da emenda.
+            resto = b""
+            while bloco := arquivo.read(1 << 20):
+                novo = codigos(bloco)
+                cod = resto + novo
+                for ordem, contagem in enumerate(contagens, start=1):
+                    contagem.update(indices_ngramas(cod, ordem, max(len(resto) - ordem + 1, 0)))
+                total += len(novo)
+                resto = cod[-3:]
+
+    with open(destino, "wb") as saida:
+        saida.write(CABECALHO.pack(MAGICO, VERSAO, idioma.encode("ascii")))
+        for tamanho, contagem in zip(TAMANHOS, contagens):
+            soma = sum(contagem.values()) or 1
+            piso = math.log10(0.01 / soma)
+            tabela = array("f", [piso] * tamanho)
+            for indice, quantidade in contagem.items():
+                tabela[indice] = math.log10(quantidade / soma)
+            if sys.byteorder != "little":
+                tabela.byteswap()
+            saida.write(tabela.tobytes())
+    return total
+
+
+def carrega(caminho):
+    """
+    Carrega um modelo gravado por treina, mapeando o arquivo em memória em vez de lê-lo.
+    Vários processos que carregam o mesmo arquivo compartilham as mesmas páginas.
+
+    Parâmetros:
+    - caminho: caminho do arquivo binário.
+
+    Retorna:
+    - um ModeloLinguagem.
+    """
+
+    with open(caminho, "rb") as arquivo:
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+    magico, versao, idioma = CABECALHO.unpack_from(mapa)
+    if magico != MAGICO or versao != VERSAO:
+        mapa.close()
+        raise ValueError(f"{caminho} não é um modelo de linguagem válido.")
+    if len(mapa) != CABECALHO.size + 4 * sum(TAMANHOS):
+        mapa.close()
+        raise ValueError(f"{caminho} está incompleto.")
+
+    if sys.byteorder != "little":
+        valores = array("f", mapa[CABECALHO.size:])
+        valores.byteswap()
+        mapa.close()
+        mapa = None
+    else:
+        valores = memoryview(mapa)[CABECALHO.size:].cast("f")
+
+    tabelas = []
+    inicio = 0
+    for tamanho in TAMANHOS:
+        tabelas.append(valores[inicio:inicio + tamanho])
+        inicio += tamanho
+    return ModeloLinguagem(idioma.decode("ascii"), *tabelas, mapa=mapa)
+
+
+@lru_cache(maxsize=None)
+def modelo(idioma="pt"):
+    """
+    Retorna o modelo de um idioma, carregado uma única vez por processo.
+    Usa o arquivo modelos/<idioma>.bin ao lado deste módulo (ou o caminho em CIFRAS_MODELO_<IDIOMA>)
+    e, se ele não existir, o modelo embutido.
+
+    Parâmetros:
+    - idioma: "pt" ou "en".
+
+    Retorna:
+    - um ModeloLinguagem.
+    """
+
+    caminho = os.environ.get(f"CIFRAS_MODELO_{idioma.upper()}",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "modelos", f"{idioma}.bin"))
+    if os.path.exists(caminho):
+        return carrega(caminho)
+    return embutido(idioma)
+
+
+def pontua(texto, idioma="pt"):
+    """
+    Mede o quanto um texto se parece com o idioma, pela soma das log-probabilidades dos seus quadrigramas.
+
+    Parâmetros:
+    - texto: o texto, como str ou bytes.
+    - idioma: "pt" ou "en".
+
+    Retorna:
+    - score: a soma das log-probabilidades (quanto maior, mais provável).
+    """
+
+    return modelo(idioma).pontua(texto)
+
+
+def main():
+    """
+    Treina um modelo pela linha de comando.
+    Exemplo: python modelo_linguagem.py corpus1.txt corpus2.txt --destino modelos/pt.bin --idioma pt
+    """
+
+    parser = argparse.ArgumentParser(prog="modelo_linguagem.py", description="Treina um modelo de n-gramas.")
+    parser.add_argument("corpus", nargs="+", help="arquivos de texto usados no treino")
+    parser.add_argument("--destino", required=True, help="arquivo binário gerado")
+    parser.add_argument("--idioma", default="pt")
+    args = parser.parse_args()
+
+    pasta = os.path.dirname(args.destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    total = treina(args.corpus, args.destino, args.idioma)
+    print(f"Modelo treinado com {total} letras em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
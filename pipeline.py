@@ -0,0 +1,283 @@
+from functools import lru_cache
+from operator import itemgetter
+
+import columnar_transposition
+import rail_fence
+import shift_cipher
+from modelo_linguagem import codigos
+from texto import Texto
+
+passos_validos = ("shift", "rail", "colunar")                                          # tipos de passo de uma cadeia
+
+
+def normaliza_passos(passos):
+    """
+    Confere os passos de uma cadeia e os converte em uma tupla, para servir de chave de cache.
+
+    Parâmetros:
+    - passos: uma sequência de (tipo, chave), com tipo "shift" (chave = deslocamento),
+      "rail" (chave = quantidade de rails) ou "colunar" (chave = palavra chave).
+
+    Retorna:
+    - a tupla de passos.
+    """
+
+    normalizados = []
+    for tipo, chave in passos:
+        if tipo not in passos_validos:
+            raise ValueError(f"Passo desconhecido: {tipo}")
+        normalizados.append((tipo, int(chave) if tipo != "colunar" else chave))
+    return tuple(normalizados)
+
+
+@lru_cache(maxsize=64)
+def compila(passos, tamanho):
+    """
+    Compila uma cadeia de cifras em um único mapa de índices e um único deslocamento.
+    Toda cadeia de transposições é uma única permutação, e todos os deslocamentos somados são um só,
+    já que deslocar as letras não muda as suas posições. Os X que completam a matriz da transposição colunar
+    entram como posições extras da origem, já deslocados para trás pelos deslocamentos anteriores a eles,
+    para que o deslocamento total, aplicado no fim, os deixe exatamente como a cadeia passo a passo deixaria.
+
+    Parâmetros:
+    - passos: a tupla de passos de normaliza_passos.
+    - tamanho: quantidade de letras do texto normalizado (sem espaços).
+
+    Retorna:
+    - indices: indices[i] é a posição, na origem, da i-ésima letra do texto cifrado.
+    - extras: as letras acrescentadas à origem depois do texto (os X da transposição colunar).
+    - deslocamento: o deslocamento total.
+    - grupo: se o último passo de transposição é colunar, a quantidade de colunas, já que a saída
+      de transposition_cipher separa as colunas com espaços; caso contrário, None.
+    """
+
+    sequencia = list(range(tamanho))
+    extras = []
+    deslocamento = 0
+    grupo = None
+
+    for tipo, chave in passos:
+        if tipo == "shift":
+            deslocamento += chave
+        elif tipo == "rail":
+            ordem, _ = rail_fence.permutacao_rail(len(sequencia), chave)
+            sequencia = [sequencia[j] for j in ordem]
+            grupo = None
+        else:
+            ordem = columnar_transposition.compila_chave(chave)
+            colunas = len(ordem)
+            linhas = -(-len(sequencia) // colunas)
+            completar = linhas * colunas - len(sequencia)
+            # Cada X entra na origem já deslocado para trás pelos deslocamentos anteriores.
+            x = shift_cipher.aplica_deslocamento("X", -deslocamento)
+            sequencia += range(tamanho + len(extras), tamanho + len(extras) + completar)
+            extras += [x] * completar
+            sequencia = [indice for coluna in ordem for indice in sequencia[coluna::colunas]]
+            grupo = colunas
+
+    return tuple(sequencia), "".join(extras), deslocamento % 26, grupo
+
+
+@lru_cache(maxsize=64)
+def compila_inversa(passos, tamanho):
+    """
+    Compila o caminho inverso de uma cadeia: para cada letra do texto original, a sua posição no texto cifrado.
+
+    Parâmetros:
+    - passos: a tupla de passos de normaliza_passos.
+    - tamanho: quantidade de letras do texto original (sem espaços).
+
+    Retorna:
+    - inversa: inversa[j] é a posição, no texto cifrado, da j-ésima letra do texto original.
+    - completas: as posições, no texto cifrado, dos X que completaram as matrizes.
+    - esperadas: as letras que devem estar nessas posições, já com o deslocamento total.
+    - deslocamento: o deslocamento total.
+    """
+
+    indices, extras, deslocamento, _ = compila(passos, tamanho)
+    inversa = [0] * tamanho
+    completas = []
+    for posicao, indice in enumerate(indices):
+        if indice < tamanho:
+            inversa[indice] = posicao
+        else:
+            completas.append(posicao)
+    esperadas = shift_cipher.aplica_deslocamento("".join(extras[indices[posicao] - tamanho] for posicao in completas),
+                                                 deslocamento)
+    return tuple(inversa), tuple(completas), esperadas, deslocamento
+
+
+def tamanhos_originais(passos, tamanho_cifrado):
+    """
+    Lista os tamanhos de texto original que a cadeia transforma em um texto cifrado de tamanho_cifrado,
+    do menor para o maior. Os X acrescentados são no máximo colunas - 1 por passo colunar.
+    """
+
+    maximo_extras = sum(len(chave) - 1 for tipo, chave in passos if tipo == "colunar")
+    return [tamanho for tamanho in range(max(tamanho_cifrado - maximo_extras, 0), tamanho_cifrado + 1)
+            if tamanho_final(passos, tamanho) == tamanho_cifrado]
+
+
+def tamanho_final(passos, tamanho):
+    """
+    Calcula o tamanho do texto cifrado, sem espaços, sem compilar a cadeia:
+    só a transposição colunar muda o tamanho, completando a última linha da matriz.
+    """
+
+    for tipo, chave in passos:
+        if tipo == "colunar":
+            tamanho = -(-tamanho // len(chave)) * len(chave)
+    return tamanho
+
+
+@lru_cache(maxsize=64)
+def compila_cifra(passos, tamanho):
+    """
+    O mapa de compila, acrescido dos espaços que transposition_cipher põe depois de cada coluna,
+    quando o último passo de transposição é colunar. O espaço é mais uma posição da origem,
+    que o deslocamento não altera.
+
+    Retorna:
+    - indices, extras e deslocamento, como em compila.
+    """
+
+    indices, extras, deslocamento, grupo = compila(passos, tamanho)
+    if grupo is None:
+        return indices, extras, deslocamento
+
+    espaco = tamanho + len(extras)
+    linhas = len(indices) // grupo
+    indices = tuple(indice for coluna in range(grupo) for indice in indices[coluna * linhas:(coluna + 1) * linhas] + (espaco,))
+    return indices, extras + " ", deslocamento
+
+
+def reune(origem, indices):
+    """
+    Monta um texto com as letras da origem nas posições de indices, numa única passagem.
+    Com numpy a cópia é um único acesso indexado a um array de code points, sem numpy é um itemgetter.
+    A origem pode ser um str ou os códigos (bytes) de um Texto; o resultado é do mesmo tipo.
+    """
+
+    if isinstance(origem, bytes):
+        if not indices:
+            return b""
+        if shift_cipher.np is not None:
+            np = shift_cipher.np
+            return np.frombuffer(origem, dtype=np.uint8)[np.asarray(indices, dtype=np.intp)].tobytes()
+        return bytes(itemgetter(*indices)(origem)) if len(indices) > 1 else origem[indices[0]:indices[0] + 1]
+
+    if not indices:
+        return ""
+    if shift_cipher.np is not None:
+        np = shift_cipher.np
+        pontos = np.frombuffer(origem.encode("utf-32-le"), dtype=np.uint32)
+        return pontos[np.asarray(indices, dtype=np.intp)].tobytes().decode("utf-32-le")
+    return "".join(itemgetter(*indices)(origem))
+
+
+def cifra(texto, passos):
+    """
+    Cifra um texto com uma cadeia de cifras, numa única passagem, sem textos intermediários.
+    O resultado é o mesmo de aplicar shift_cipher, rail_fence e transposition_cipher um depois do outro.
+
+    Parâmetros:
+    - texto: a mensagem original (str ou Texto).
+    - passos: uma sequência de (tipo, chave), como [("shift", 3), ("rail", 4), ("colunar", "CHAVE")].
+
+    Retorna:
+    - ciphertext: a mensagem cifrada (um Texto, sem os espaços entre as colunas, se a mensagem for um Texto).
+    """
+
+    passos = normaliza_passos(passos)
+    # Sem transposição, a cadeia é só um deslocamento, e o texto mantém espaços, como em shift_cipher.
+    if all(tipo == "shift" for tipo, _ in passos):
+        return shift_cipher.aplica_deslocamento(texto, sum(chave for _, chave in passos))
+
+    if isinstance(texto, Texto):
+        indices, extras, deslocamento, _ = compila(passos, len(texto))
+        cifrado = reune(texto.bytes() + codigos(extras), indices)
+        return texto.com_codigos(cifrado.translate(shift_cipher.tabelas_codigos[deslocamento]))
+
+    texto = texto.replace(" ", "").upper()
+    indices, extras, deslocamento = compila_cifra(passos, len(texto))
+    return shift_cipher.aplica_deslocamento(reune(texto + extras, indices), deslocamento)
+
+
+def decifra(ciphertext, passos, tamanho=None):
+    """
+    Decifra um texto cifrado por uma cadeia de cifras, conhecendo as chaves, numa única passagem.
+    Os X que completaram as matrizes da transposição colunar são descartados. Quando mais de um tamanho
+    de texto original é compatível com o texto cifrado, vale o menor cujos X estão nas posições esperadas,
+    o que confere o maior número de X: um texto original que termina com X pode perdê-los.
+    Quem conhece o tamanho do texto original pode informá-lo, e então não há ambiguidade.
+
+    Parâmetros:
+    - ciphertext: a mensagem cifrada (str ou Texto).
+    - passos: a mesma sequência de passos usada para cifrar.
+    - tamanho: a quantidade de letras do texto original, sem espaços (None escolhe pelos X, como descrito acima).
+
+    Retorna:
+    - plaintext: a mensagem original, sem espaços e em maiúsculas (um Texto, se a mensagem cifrada for um Texto).
+    """
+
+    passos = normaliza_passos(passos)
+    if all(tipo == "shift" for tipo, _ in passos):
+        return shift_cipher.aplica_deslocamento(ciphertext, -sum(chave for _, chave in passos))
+
+    if isinstance(ciphertext, Texto):
+        origem = ciphertext.bytes()
+    else:
+        origem = ciphertext.replace(" ", "").upper()
+
+    def decifrado(tamanho):
+        inversa, _, _, deslocamento = compila_inversa(passos, tamanho)
+        plaintext = reune(origem, inversa)
+        if isinstance(ciphertext, Texto):
+            return ciphertext.com_codigos(plaintext.translate(shift_cipher.tabelas_codigos[-deslocamento % 26]))
+        return shift_cipher.aplica_deslocamento(plaintext, -deslocamento)
+
+    if tamanho is not None:
+        if tamanho_final(passos, tamanho) != len(origem):
+            raise ValueError("O tamanho informado não é compatível com o texto cifrado.")
+        return decifrado(tamanho)
+
+    for tamanho in tamanhos_originais(passos, len(origem)):
+        _, completas, esperadas, _ = compila_inversa(passos, tamanho)
+        if isinstance(ciphertext, Texto):
+            esperadas = codigos(esperadas)
+        if reune(origem, completas) == esperadas:
+            return decifrado(tamanho)
+    raise ValueError("O texto cifrado não é compatível com a cadeia.")
+
+
+def quebra(ciphertext, transposicao="rail", max_chave=10, idioma="pt", **opcoes):
+    """
+    Quebra uma cadeia de deslocamentos e de uma transposição, sem conhecer as chaves.
+    Primeiro descobre o deslocamento total pela distribuição de frequências, que a transposição não altera,
+    já que ela só muda as letras de lugar. Depois quebra a transposição do texto já sem o deslocamento.
+    Uma cadeia com mais de uma transposição não é quebrada corretamente, já que ela não é um Rail Fence
+    nem uma transposição colunar simples.
+
+    Parâmetros:
+    - ciphertext: a mensagem cifrada.
+    - transposicao: "rail" ou "colunar", o tipo da transposição da cadeia.
+    - max_chave: maior quantidade de rails, ou maior tamanho de chave, testado.
+    - idioma: o idioma da distribuição de frequências.
+    - opcoes: parâmetros repassados para quebra_cifra_ranqueada (rail) ou quebra_cifra_paralela (colunar).
+
+    Retorna:
+    - Uma lista de (deslocamento, chave, mensagem, score), da maior pontuação para a menor,
+      em que chave é a quantidade de rails ou o tamanho da chave colunar.
+    """
+
+    ciphertext = ciphertext.letras() if isinstance(ciphertext, Texto) else ciphertext.replace(" ", "").upper()
+    deslocamento = shift_cipher.ranqueia_deslocamentos(ciphertext, 1, idioma)[0][0]
+    texto = shift_cipher.decifra(ciphertext, deslocamento)
+
+    if transposicao == "rail":
+        candidatos = rail_fence.quebra_cifra_ranqueada(texto, max_chave + 1, **opcoes)
+    elif transposicao == "colunar":
+        candidatos = columnar_transposition.quebra_cifra_paralela(texto, max_chave, **opcoes)
+    else:
+        raise ValueError(f"Transposição desconhecida: {transposicao}")
+    return [(deslocamento, chave, mensagem, score) for chave, mensagem, score in candidatos]
@@ -1,90 +1,461 @@
+import argparse
+import mmap
+import os
+import sys
+import time
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from instrumentacao import etapa, mede_cache
+from modelo_linguagem import frequencias_portugues, modelo
+from texto import Texto
+
+maiusculas = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")   # tabela de bytes.translate para maiúsculas
+
+
 def rail_fence(texto, linhas):
     """
     Criptografa uma mesagem desejada, utilizando transposição por Rail Fence.
 
     Parâmetros:
-    - texto: a mensagem original.
+    - texto: a mensagem original (str ou Texto).
     - linhas: em quantas linhas a mensagem será dividida.
 
     Retorna:
-    - ciphertext: a mensagem cifrada.
+    - ciphertext: a mensagem cifrada (um Texto, se a mensagem for um Texto).
     """
 
-    lista = ["" for _ in range(linhas)] 
-    texto = texto.replace(" ", "").upper()
-    ciphertext = ""
-    counter = 0
-    ida_volta = True
+    if not isinstance(texto, Texto):
+        texto = texto.replace(" ", "").upper()
+    ciphertext = reordena(texto, linhas, decifrar=False)
+    return ciphertext
 
-    for letra in texto:
-        lista[counter] += letra 
-        
-        counter, ida_volta = ida_ou_volta(counter, linhas, ida_volta)
 
-    for linha in lista:
-        ciphertext += linha
+@lru_cache(maxsize=128)
+def trilhos(tamanho, linhas):
+    """
+    Calcula onde cada linha começa no texto cifrado e quantas letras ela tem, sem percorrer o zigue-zague.
+    O zigue-zague se repete a cada 2 * (linhas - 1) letras, então a linha r recebe as posições
+    r, r + periodo, r + 2 * periodo... e, nas linhas do meio, também as espelhadas periodo - r, 2 * periodo - r...
+
+    Parâmetros:
+    - tamanho: quantidade de letras do texto.
+    - linhas: quantidade de rails.
+
+    Retorna:
+    - uma tupla com (inicio, comprimento) de cada linha no texto cifrado.
+    """
+
+    if linhas < 1:
+        raise ValueError("A quantidade de linhas deve ser pelo menos 1.")
+    if linhas == 1:
+        return ((0, tamanho),)
+
+    periodo = 2 * (linhas - 1)
+    posicoes = []
+    inicio = 0
+    for linha in range(linhas):
+        comprimento = len(range(linha, tamanho, periodo))
+        if 0 < linha < linhas - 1:
+            comprimento += len(range(periodo - linha, tamanho, periodo))
+        posicoes.append((inicio, comprimento))
+        inicio += comprimento
+    return tuple(posicoes)
+
 
-    return ciphertext    
+def transpoe(origem, destino, linhas, decifrar=False):
+    """
+    Copia as letras entre o texto original e o texto cifrado, uma linha por vez, com fatiamento.
+    Funciona com qualquer sequência que aceite atribuição por fatias com passo (list, bytearray, mmap).
 
+    Parâmetros:
+    - origem: a sequência lida.
+    - destino: a sequência escrita, do mesmo tamanho da origem.
+    - linhas: a quantidade de rails.
+    - decifrar: False se a origem é o texto original, True se a origem é o texto cifrado.
+    """
 
-def ida_ou_volta(counter, linhas, ida_volta):
+    tamanho = len(origem)
+    if linhas == 1:
+        destino[0:tamanho] = origem[0:tamanho]
+        return
+
+    periodo = 2 * (linhas - 1)
+    for linha, (inicio, comprimento) in enumerate(trilhos(tamanho, linhas)):
+        fim = inicio + comprimento
+        # Nas linhas da borda só há uma sequência de posições, nas do meio há duas intercaladas.
+        if linha == 0 or linha == linhas - 1:
+            fatias = [(slice(linha, tamanho, periodo), slice(inicio, fim))]
+        else:
+            fatias = [(slice(linha, tamanho, periodo), slice(inicio, fim, 2)),
+                      (slice(periodo - linha, tamanho, periodo), slice(inicio + 1, fim, 2))]
+
+        for original, cifrado in fatias:
+            if decifrar:
+                original, cifrado = cifrado, original
+            letras = origem[original]
+            # Nem todo destino (como o mmap) aceita uma memoryview com passo, então ela vira bytes.
+            if isinstance(letras, memoryview) and not letras.c_contiguous:
+                letras = letras.tobytes()
+            destino[cifrado] = letras
+
+
+def permutacao_rail(tamanho, linhas):
     """
-    Define se a contagem de letras está indo ou voltando.
+    Calcula a permutação do Rail Fence para um tamanho de texto e sua inversa.
 
     Parâmetros:
-    - counter: index da lista.
+    - tamanho: quantidade de letras do texto.
     - linhas: quantidade de rails.
-    - ida_volta: True se está indo, False se está voltando.
 
     Retorna:
-    - counter: o próximo index da lista.
-    - ida_volta: se está indo ou voltando.
+    - ordem: ordem[i] é a posição no texto original da i-ésima letra do texto cifrado.
+    - inversa: inversa[j] é a posição no texto cifrado da j-ésima letra do texto original.
     """
 
-    # Diagonal avançando.
-    if ida_volta:
-        counter += 1
-    # Diagonal retornando.    
-    else:    
-        counter -= 1
+    ordem = [0] * tamanho
+    transpoe(range(tamanho), ordem, linhas)
+    inversa = [0] * tamanho
+    transpoe(range(tamanho), inversa, linhas, decifrar=True)
+    return tuple(ordem), tuple(inversa)
 
-    # Ao chegar na base volta uma linha
-    if counter == linhas:
-        counter -= 2
-        ida_volta = False 
-    # Ao chegar no teto volta uma linha      
-    if counter == -1:
-        counter += 2
-        ida_volta = True    
 
-    return counter, ida_volta
+def posicao_cifrada(posicao, tamanho, linhas):
+    """
+    Calcula a posição, no texto cifrado, de uma letra do texto original, sem montar a permutação.
 
+    Parâmetros:
+    - posicao: a posição da letra no texto original.
+    - tamanho: quantidade de letras do texto.
+    - linhas: quantidade de rails.
+
+    Retorna:
+    - a posição da letra no texto cifrado.
+    """
 
-def quebra_cifra(texto, max_linhas:int):
+    if linhas == 1:
+        return posicao
+    periodo = 2 * (linhas - 1)
+    ciclo, fase = divmod(posicao, periodo)
+    linha = fase if fase < linhas else periodo - fase
+    inicio = trilhos(tamanho, linhas)[linha][0]
+    # Nas linhas da borda há uma letra por ciclo, nas do meio há duas: a da descida e a da subida.
+    if linha == 0 or linha == linhas - 1:
+        return inicio + ciclo
+    return inicio + 2 * ciclo + (fase >= linhas)
+
+
+def posicao_original(posicao, tamanho, linhas):
+    """
+    Calcula a posição, no texto original, de uma letra do texto cifrado, sem montar a permutação.
+
+    Parâmetros:
+    - posicao: a posição da letra no texto cifrado.
+    - tamanho: quantidade de letras do texto.
+    - linhas: quantidade de rails.
+
+    Retorna:
+    - a posição da letra no texto original.
+    """
+
+    if linhas == 1:
+        return posicao
+    periodo = 2 * (linhas - 1)
+    posicoes = trilhos(tamanho, linhas)
+    linha = bisect_right(posicoes, posicao, key=lambda trilho: trilho[0]) - 1
+    indice = posicao - posicoes[linha][0]
+    if linha == 0 or linha == linhas - 1:
+        return linha + indice * periodo
+    ciclo, subida = divmod(indice, 2)
+    return ciclo * periodo + (periodo - linha if subida else linha)
+
+
+def contem_crib(texto, linhas, crib):
+    """
+    Confere se o texto decifrado com uma quantidade de rails contém um trecho conhecido (crib), sem decifrá-lo.
+    Cada ocorrência, no texto cifrado, da letra mais rara do crib é levada à sua posição no texto original,
+    e as outras letras do crib são conferidas ali, consultando só as suas posições no texto cifrado.
+    Quando essa letra é comum no texto, decifrar por fatiamento e procurar o crib sai mais barato, e é o que é feito.
+
+    Parâmetros:
+    - texto: o texto cifrado, sem espaços e em maiúsculas.
+    - linhas: a quantidade de rails.
+    - crib: o trecho conhecido, sem espaços e em maiúsculas.
+
+    Retorna:
+    - True se o crib aparece no texto decifrado (sempre, para um crib vazio).
+    """
+
+    tamanho = len(texto)
+    if not crib:
+        return True
+    if len(crib) > tamanho:
+        return False
+    ancora = min(range(len(crib)), key=lambda i: frequencias_portugues.get(crib[i], 0.0))
+    # Conferir uma ocorrência custa algumas centenas de vezes mais que copiar uma letra ao decifrar.
+    if texto.count(crib[ancora]) * 256 > tamanho:
+        return crib in reordena(texto, linhas, decifrar=True)
+
+    posicao = texto.find(crib[ancora])
+    while posicao != -1:
+        inicio = posicao_original(posicao, tamanho, linhas) - ancora
+        if 0 <= inicio <= tamanho - len(crib) and all(texto[posicao_cifrada(inicio + i, tamanho, linhas)] == letra
+                                                     for i, letra in enumerate(crib)):
+            return True
+        posicao = texto.find(crib[ancora], posicao + 1)
+    return False
+
+
+def reordena(texto, linhas, decifrar=False):
+    """
+    Cifra ou decifra um texto já sem espaços.
+
+    Parâmetros:
+    - texto: o texto sem espaços, ou um Texto.
+    - linhas: a quantidade de rails.
+    - decifrar: False para cifrar, True para decifrar.
+
+    Retorna:
+    - o texto reordenado, do mesmo tipo da entrada.
+    """
+
+    if isinstance(texto, Texto):
+        destino = bytearray(len(texto))
+        transpoe(texto.codigos, destino, linhas, decifrar)
+        return texto.com_codigos(bytes(destino))
+
+    # Textos ASCII são copiados entre bytearrays, sem criar um objeto por letra.
+    if texto.isascii():
+        destino = bytearray(len(texto))
+        transpoe(texto.encode("ascii"), destino, linhas, decifrar)
+        return destino.decode("ascii")
+
+    # Os outros são copiados letra a letra para uma lista, pelas mesmas fatias, sem montar a permutação inteira.
+    destino = [""] * len(texto)
+    transpoe(texto, destino, linhas, decifrar)
+    return "".join(destino)
+
+
+def quebra_cifra(texto, max_linhas:int, estatisticas=None, cache=None, crib=None):
     """
     Decifra uma mensagem criptografada por Rail Fence.
 
     Parâmetros:
     - texto: a mensagem cifrada.
     - max_linhas: máximo de linhas consideradas para decifrar.
+    - estatisticas: um instrumentacao.Estatisticas, para contar os candidatos e medir as etapas (opcional).
+    - cache: um cache.Cache; se o mesmo texto já foi quebrado, o resultado guardado é retornado (opcional).
+    - crib: um trecho que a mensagem original contém; as quantidades de rails em que ele não aparece
+      são descartadas sem decifrar o texto (opcional).
 
     Retorna:
     - Uma lista com as possíveis mensagens e seus respectivos rails.
     """
 
+    # A chave do cache e a quebra usam o mesmo texto: os espaços mudariam o limite de rails.
+    texto = texto.letras() if isinstance(texto, Texto) else texto.replace(" ", "")
+    if crib is not None:
+        crib = crib.replace(" ", "").upper() or None                                  # um crib vazio não restringe nada
+    if cache is not None:
+        return cache.obtem("rail_fence.quebra_cifra", texto, {"max_linhas": max_linhas, "crib": crib},
+                           lambda: quebra_cifra(texto, max_linhas, estatisticas, crib=crib))
 
     possiveis_mensagens = []
 
     if len(texto) < max_linhas:
         max_linhas = len(texto)
+    candidatos = range(2, max_linhas)
+
+    if crib is not None:
+        cifrado = texto.upper()
+        with etapa(estatisticas, "crib"):
+            candidatos = [linha for linha in candidatos if contem_crib(cifrado, linha, crib)]
+        if estatisticas is not None:
+            estatisticas.conta("espaco", max(max_linhas - 2, 0))
+            estatisticas.conta("podados_crib", max(max_linhas - 2, 0) - len(candidatos))
+
+    with etapa(estatisticas, "decifra"), mede_cache(estatisticas, trilhos):
+        for linha in candidatos:
+            plaintext = decifra(texto, linha)
+            possiveis_mensagens.append((linha, plaintext))
+
+    if estatisticas is not None:
+        estatisticas.conta("gerados", len(possiveis_mensagens))
+        estatisticas.conta("bytes", len(texto) * len(possiveis_mensagens))
+    return possiveis_mensagens
 
-    for linha in range(2, max_linhas):
-        lista = tamanho_linhas(texto, linha)
-        ciphertext = separa_texto(texto, lista)
-        plaintext = decifra_rail(ciphertext, linha)
-        possiveis_mensagens.append((linha, plaintext))
 
-    return possiveis_mensagens
+def pontua(texto):
+    """
+    Mede o quanto um texto se parece com português, pelo modelo de linguagem de quadrigramas.
+
+    Parâmetros:
+    - texto: o texto em maiúsculas e sem espaços.
+
+    Retorna:
+    - score: a log-probabilidade média por quadrigrama (quanto maior, mais provável).
+    """
+
+    return modelo("pt").pontua_por_letra(texto)
+
+
+texto_processo = ""                                                                     # texto cifrado de cada processo do quebra_cifra_ranqueada
+
+
+def inicia_processo(texto):
+    """
+    Guarda o texto cifrado no processo, para que ele não seja enviado a cada tarefa.
+
+    Parâmetros:
+    - texto: o texto cifrado, sem espaços.
+    """
+
+    global texto_processo
+    texto_processo = texto
+
+
+def pontua_linhas(linhas, texto=None, medir=False):
+    """
+    Decifra o texto com uma quantidade de rails e calcula sua pontuação.
+
+    Parâmetros:
+    - linhas: a quantidade de rails.
+    - texto: o texto cifrado, sem espaços (por padrão, o texto guardado no processo).
+    - medir: se True, também retorna o tempo gasto para decifrar e para pontuar.
+
+    Retorna:
+    - linhas: a quantidade de rails.
+    - score: a pontuação do texto decifrado.
+    - segundos_decifra, segundos_pontua: só se medir for True.
+    """
+
+    if texto is None:
+        texto = texto_processo
+    if not medir:
+        return linhas, pontua(reordena(texto, linhas, decifrar=True))
+
+    inicio = time.perf_counter()
+    plaintext = reordena(texto, linhas, decifrar=True)
+    meio = time.perf_counter()
+    score = pontua(plaintext)
+    return linhas, score, meio - inicio, time.perf_counter() - meio
+
+
+def quebra_cifra_ranqueada(texto, max_linhas:int, processos=None, limiar=None, tempo_limite=None, melhores=10,
+                           estatisticas=None, crib=None):
+    """
+    Decifra uma mensagem criptografada por Rail Fence, testando as quantidades de rails em paralelo
+    e ordenando os candidatos pela pontuação do modelo de linguagem.
+
+    Parâmetros:
+    - texto: a mensagem cifrada.
+    - max_linhas: máximo de linhas consideradas para decifrar, como em quebra_cifra.
+    - processos: quantos processos usar (por padrão, um por CPU; nunca mais que as quantidades de rails testadas;
+      1 roda tudo no processo atual).
+    - limiar: se um candidato passar dessa pontuação (log-probabilidade média por quadrigrama, como -3.5), a busca para.
+    - tempo_limite: tempo máximo de busca, em segundos.
+    - melhores: quantos candidatos, dos melhores, vêm com a mensagem decifrada.
+    - estatisticas: um instrumentacao.Estatisticas, para contar os candidatos e somar o tempo de cada etapa,
+      inclusive o dos outros processos (opcional).
+    - crib: um trecho que a mensagem original contém, como em quebra_cifra (opcional).
+
+    Retorna:
+    - Uma lista de (linhas, mensagem, score), da maior pontuação para a menor. Fora dos melhores, a mensagem é None.
+    """
+
+    texto = texto.letras() if isinstance(texto, Texto) else texto.replace(" ", "").upper()
+    max_linhas = min(max_linhas, len(texto))
+    candidatos = range(2, max_linhas)
+    if crib is not None:
+        crib = crib.replace(" ", "").upper() or None
+    if crib is not None:
+        with etapa(estatisticas, "crib"):
+            candidatos = [linhas for linhas in candidatos if contem_crib(texto, linhas, crib)]
+        if estatisticas is not None:
+            estatisticas.conta("espaco", max(max_linhas - 2, 0))
+            estatisticas.conta("podados_crib", max(max_linhas - 2, 0) - len(candidatos))
+    # Mais processos que quantidades de rails só custariam a criação dos processos.
+    processos = min(processos or os.cpu_count() or 1, max(len(candidatos), 1))
+    fim = time.monotonic() + tempo_limite if tempo_limite is not None else None
+    scores = []
+
+    medir = estatisticas is not None
+
+    def encerrar():
+        if limiar is not None and scores and scores[-1][1] > limiar:
+            return True
+        return fim is not None and time.monotonic() >= fim
+
+    def registra(resultado):
+        scores.append(resultado[:2])
+        if medir:
+            estatisticas.conta("pontuados")
+            estatisticas.conta("bytes", len(texto))
+            estatisticas.soma_tempo("decifra", resultado[2])
+            estatisticas.soma_tempo("pontuacao", resultado[3])
+            estatisticas.melhora(resultado[1])
+            estatisticas.avisa()
+
+    if medir:
+        estatisticas.conta("gerados", len(candidatos))
+    if processos == 1:
+        for linhas in candidatos:
+            registra(pontua_linhas(linhas, texto, medir))
+            if encerrar():
+                break
+    else:
+        # O modelo é carregado antes de criar os processos, que o herdam já pronto.
+        modelo("pt")
+        executor = ProcessPoolExecutor(processos, initializer=inicia_processo, initargs=(texto,))
+        try:
+            pendentes = {executor.submit(pontua_linhas, linhas, None, medir) for linhas in candidatos}
+            while pendentes:
+                restante = None if fim is None else max(fim - time.monotonic(), 0)
+                prontos, pendentes = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    registra(futuro.result())
+                    if encerrar():
+                        break
+                if encerrar():
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    scores.sort(key=lambda x: x[1], reverse=True)
+    with etapa(estatisticas, "decifra"):
+        return [(linhas, reordena(texto, linhas, decifrar=True) if i < melhores else None, score)
+                for i, (linhas, score) in enumerate(scores)]
+
+
+def quebra_conjunta(textos, max_linhas:int, melhores=3):
+    """
+    Decifra várias mensagens cifradas com a mesma quantidade de rails, pontuando cada candidato
+    pela soma das pontuações de todas as mensagens. Mensagens curtas demais para serem quebradas sozinhas
+    somam as suas evidências, e a quantidade de rails escolhida vale para todas.
+
+    Parâmetros:
+    - textos: as mensagens cifradas.
+    - max_linhas: máximo de linhas consideradas para decifrar, como em quebra_cifra.
+    - melhores: quantos candidatos, dos melhores, vêm com as mensagens decifradas.
+
+    Retorna:
+    - Uma lista de (linhas, mensagens, score), da maior pontuação para a menor, em que score é a pontuação
+      por letra de todas as mensagens decifradas. Fora dos melhores, mensagens é None.
+    """
+
+    textos = [texto.letras() if isinstance(texto, Texto) else texto.replace(" ", "").upper() for texto in textos]
+    max_linhas = min(max_linhas, max(map(len, textos), default=0))
+    lm = modelo("pt")
+
+    scores = []
+    for linhas in range(2, max_linhas):
+        # Cada mensagem é pontuada sozinha, para que os quadrigramas entre duas mensagens não contem.
+        scores.append((linhas, lm.pontua_mensagens(reordena(texto, linhas, decifrar=True) for texto in textos)))
+    scores.sort(key=lambda x: x[1], reverse=True)
+
+    return [(linhas, [reordena(texto, linhas, decifrar=True) for texto in textos] if i < melhores else None, score)
+            for i, (linhas, score) in enumerate(scores)]
 
 
 def tamanho_linhas(texto, linhas):
@@ -99,16 +470,9 @@ def tamanho_linhas(texto, linhas):
     - lista: cada item da lista é um número que aponta quantas letras ela possui.
     """
 
-    lista = [0 for _ in range(linhas)] 
-    texto = texto.replace(" ", "")
-    counter = 0
-    ida_volta = True
-
-    for letra in texto:
-        lista[counter] += 1
-        
-        counter, ida_volta = ida_ou_volta(counter, linhas, ida_volta)   
-
+    if not isinstance(texto, Texto):
+        texto = texto.replace(" ", "")
+    lista = [comprimento for _, comprimento in trilhos(len(texto), linhas)]
     return lista
 
 
@@ -124,19 +488,13 @@ def separa_texto(texto, lista):
     - texto_separado: uma lista com letras em cada item.
     """
 
-    texto_separado = ["" for _ in range(len(lista))]
-    counter = 0
-    idx = 0
-
-    for letra in texto:
-        if lista and (counter == lista[0]):
-            counter = 0
-            idx += 1
-            del lista[0]
-
-        texto_separado[idx] += letra
-        counter += 1
-
+    texto_separado = []
+    inicio = 0
+    for comprimento in lista[:-1]:
+        texto_separado.append(texto[inicio:inicio + comprimento])
+        inicio += comprimento
+    # A última linha fica com o que sobrar do texto.
+    texto_separado.append(texto[inicio:])
     return texto_separado
 
 
@@ -152,41 +510,126 @@ def decifra_rail(texto_separado, linhas):
     - plaintext: a mensagem original
     """
 
-    tamanho_texto = sum(len(t) for t in texto_separado)
-    plaintext = ""
-    counter = 0
-    ida_volta = True 
+    plaintext = reordena("".join(texto_separado), linhas, decifrar=True)
+    return plaintext
 
-    for letra in range(tamanho_texto):
-        letra, texto_separado[counter] = pop(texto_separado[counter])
-        plaintext += letra
-        
-        counter, ida_volta = ida_ou_volta(counter, linhas, ida_volta)
 
-    return plaintext        
+def decifra(texto, linhas):
+    """
+    Decifra um ciphertext diretamente, sem separá-lo em linhas.
+    Cada linha é copiada do texto cifrado para as suas posições no texto original com fatiamento,
+    então o tempo é linear e a memória extra é proporcional a uma cópia do texto.
+
+    Parâmetros:
+    - texto: o texto cifrado (str ou Texto).
+    - linhas: a quantidade de rails.
+
+    Retorna:
+    - plaintext: a mensagem original (um Texto, se o texto cifrado for um Texto).
+    """
+
+    if not isinstance(texto, Texto):
+        texto = texto.replace(" ", "")
+    plaintext = reordena(texto, linhas, decifrar=True)
+    return plaintext
 
 
-def pop(string):
+def normaliza_bytes(origem, tamanho_bloco=1 << 20):
     """
-    Remove e retorna o primeiro caractere de uma string.
+    Remove os espaços, as tabulações e as quebras de linha e passa para maiúsculas um texto em bytes, um bloco por vez.
 
     Parâmetros:
-    - string: a string a ser manipulada
+    - origem: o texto como bytes, bytearray, memoryview ou mmap.
+    - tamanho_bloco: quantos bytes são normalizados por vez.
 
     Retorna:
-    - primeiro_caractere: primeiro caractere da string 
-    - nova_string: string sem o primeiro item
+    - texto: um bytearray com o texto normalizado.
     """
 
-    if string:
-        primeiro_caractere = string[0]
-        nova_string = string[1:]
-        return primeiro_caractere, nova_string
-    else:
-        return '', string
-    
+    visao = memoryview(origem)
+    texto = bytearray()
+    for posicao in range(0, len(visao), tamanho_bloco):
+        texto += visao[posicao:posicao + tamanho_bloco].tobytes().translate(maiusculas, b" \t\r\n")
+    return texto
+
+
+def rail_fence_bytes(origem, linhas, destino=None, decifrar=False, normalizar=True):
+    """
+    Cifra ou decifra um texto em bytes, escrevendo cada linha direto na sua posição final.
+
+    Parâmetros:
+    - origem: o texto como bytes, bytearray, memoryview ou mmap.
+    - linhas: a quantidade de rails.
+    - destino: buffer já alocado com o tamanho do texto normalizado, como um bytearray ou um mmap (opcional).
+    - decifrar: False para cifrar, True para decifrar.
+    - normalizar: se False, a origem já está sem espaços e quebras de linha e em maiúsculas e é lida sem cópia.
+
+    Retorna:
+    - destino: o buffer com o texto cifrado ou decifrado.
+    """
+
+    texto = normaliza_bytes(origem) if normalizar else memoryview(origem)
+    if destino is None:
+        destino = bytearray(len(texto))
+    if len(destino) != len(texto):
+        raise ValueError("O destino deve ter o mesmo tamanho do texto normalizado.")
+    transpoe(texto, destino, linhas, decifrar)
+    return destino
 
 
+def cifra_arquivo(origem, destino, linhas, decifrar=False):
+    """
+    Cifra ou decifra um arquivo, lendo a origem por mmap e escrevendo num arquivo de destino mapeado em memória.
+    Além das páginas mapeadas, a memória usada é a de uma cópia do texto normalizado.
+
+    Parâmetros:
+    - origem: caminho do arquivo de entrada.
+    - destino: caminho do arquivo de saída.
+    - linhas: a quantidade de rails.
+    - decifrar: False para cifrar, True para decifrar.
+
+    Retorna:
+    - tamanho: a quantidade de letras escritas no destino.
+    """
+
+    with open(origem, "rb") as entrada:
+        if entrada.seek(0, 2) == 0:
+            texto = bytearray()
+        else:
+            with mmap.mmap(entrada.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                texto = normaliza_bytes(mapa)
+
+    tamanho = len(texto)
+    with open(destino, "w+b") as saida:
+        saida.truncate(tamanho)
+        if tamanho:
+            with mmap.mmap(saida.fileno(), tamanho) as mapa:
+                rail_fence_bytes(texto, linhas, mapa, decifrar, normalizar=False)
+                mapa.flush()
+    return tamanho
+
+
+def linha_de_comando(argumentos):
+    """
+    Cifra ou decifra arquivos sem passar pelo menu interativo.
+    Exemplo: python rail_fence.py cifra entrada.txt saida.txt 3
+
+    Parâmetros:
+    - argumentos: a lista de argumentos da linha de comando, sem o nome do programa.
+    """
+
+    parser = argparse.ArgumentParser(prog="rail_fence.py", description="Transposição Rail Fence de arquivos.")
+    parser.add_argument("operacao", choices=["cifra", "decifra"])
+    parser.add_argument("origem")
+    parser.add_argument("destino")
+    parser.add_argument("linhas", type=int)
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    tamanho = cifra_arquivo(args.origem, args.destino, args.linhas, args.operacao == "decifra")
+    segundos = time.perf_counter() - inicio
+    print(f"{tamanho / (1 << 20):.2f} MB processados em {segundos:.2f} s")
+
 
 def main():
     """
@@ -232,5 +675,9 @@ def main():
                 print("Você deve escolher entre (1), (2) ou (3). Tente novamente!")
                 input("Digite (0) para voltar ao menu: ")
 
-main()
 
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        linha_de_comando(sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import lote
+
+
+class Agrupador:
+    """
+    Junta os pedidos pequenos de cifra por deslocamento que chegam quase ao mesmo tempo
+    e os cifra de uma vez com shift_cipher.cifra_lote.
+    Um lote é enviado quando junta max_lote pedidos ou quando o primeiro pedido espera espera segundos.
+    """
+
+    def __init__(self, max_lote=1024, espera=0.002):
+        """
+        Parâmetros:
+        - max_lote: quantos pedidos no máximo por lote.
+        - espera: quanto tempo o primeiro pedido de um lote espera pelos outros, em segundos.
+        """
+
+        self.max_lote = max_lote
+        self.espera = espera
+        self.fila = []
+        self.agendado = None
+        self.lotes = 0
+
+    def cifra(self, texto, deslocamento):
+        """
+        Agenda uma mensagem para o próximo lote.
+
+        Parâmetros:
+        - texto: a mensagem.
+        - deslocamento: o deslocamento (negativo para decifrar).
+
+        Retorna:
+        - um asyncio.Future com a mensagem cifrada.
+        """
+
+        laco = asyncio.get_running_loop()
+        futuro = laco.create_future()
+        self.fila.append((texto, deslocamento, futuro))
+        if len(self.fila) >= self.max_lote:
+            self.despacha()
+        elif self.agendado is None:
+            self.agendado = laco.call_later(self.espera, self.despacha)
+        return futuro
+
+    def despacha(self):
+        """
+        Cifra todas as mensagens da fila com uma única chamada de cifra_lote.
+        """
+
+        if self.agendado is not None:
+            self.agendado.cancel()
+            self.agendado = None
+        fila, self.fila = self.fila, []
+        if not fila:
+            return
+
+        self.lotes += 1
+        try:
+            cifradas = lote.cifra_modulo("shift").cifra_lote([texto for texto, _, _ in fila],
+                                                             [deslocamento for _, deslocamento, _ in fila])
+        except Exception as erro:
+            for _, _, futuro in fila:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        for (_, _, futuro), cifrada in zip(fila, cifradas):
+            if not futuro.done():
+                futuro.set_result(cifrada)
+
+
+class Servico:
+    """
+    Servidor asyncio das cifras, com um protocolo TCP de linhas JSON: cada linha recebida é uma tarefa
+    no formato de lote.py ({"id", "cipher", "operation", "key", "text"}) e cada linha enviada é a resposta
+    ({"id", "resultado"} ou {"id", "erro"}). As respostas podem chegar fora de ordem; o "id" as identifica.
+
+    - Cifra e decifra por deslocamento são agrupadas em lotes pelo Agrupador.
+    - As outras cifras e decifras, que são lineares, rodam direto no laço de eventos.
+    - As quebras vão para um ProcessPoolExecutor. No máximo capacidade quebras ficam pendentes:
+      acima disso, o servidor para de ler da conexão até uma delas terminar, e o TCP segura o cliente.
+      Cada quebra tem um tempo limite, repassado à busca e conferido com asyncio.wait_for.
+    """
+
+    def __init__(self, processos=None, capacidade=None, tempo_limite=30.0, max_lote=1024, espera=0.002):
+        """
+        Parâmetros:
+        - processos: quantos processos para as quebras (por padrão, um por CPU).
+        - capacidade: quantas quebras podem estar pendentes ao mesmo tempo (por padrão, duas por processo).
+        - tempo_limite: tempo máximo de cada quebra, em segundos.
+        - max_lote, espera: os parâmetros do Agrupador.
+        """
+
+        self.processos = processos or os.cpu_count() or 1
+        self.capacidade = capacidade or 2 * self.processos
+        self.tempo_limite = tempo_limite
+        self.agrupador = Agrupador(max_lote, espera)
+        self.executor = None
+        self.vagas = None
+
+    async def inicia(self, endereco="127.0.0.1", porta=8765):
+        """
+        Abre o servidor TCP.
+
+        Retorna:
+        - o asyncio.Server.
+        """
+
+        self.executor = ProcessPoolExecutor(self.processos)
+        self.vagas = asyncio.Semaphore(self.capacidade)
+        # O limite de linha padrão do asyncio (64 KB) é pequeno para textos grandes.
+        return await asyncio.start_server(self.atende, endereco, porta, limit=1 << 26)
+
+    def encerra(self):
+        """
+        Encerra o pool de processos das quebras.
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def atende(self, leitor, escritor):
+        """
+        Atende uma conexão, lendo tarefas enquanto o cliente enviar.
+        """
+
+        trava = asyncio.Lock()
+        tarefas = set()
+        numero = 0
+        try:
+            while linha := await leitor.readline():
+                if not linha.strip():
+                    continue
+                try:
+                    tarefa = json.loads(linha)
+                    if not isinstance(tarefa, dict):
+                        raise ValueError("A tarefa deve ser um objeto JSON.")
+                    tarefa.setdefault("id", numero)
+                except ValueError as erro:
+                    tarefa = {"id": numero, "erro": f"{type(erro).__name__}: {erro}"}
+                numero += 1
+                if tarefa.get("operation") == "quebra" and "erro" not in tarefa:
+                    # Sem vaga, a leitura da conexão para até uma quebra terminar.
+                    await self.vagas.acquire()
+                pendente = asyncio.create_task(self.responde(tarefa, escritor, trava))
+                tarefas.add(pendente)
+                pendente.add_done_callback(tarefas.discard)
+            if tarefas:
+                await asyncio.gather(*tarefas)
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def responde(self, tarefa, escritor, trava):
+        """
+        Executa uma tarefa e escreve a resposta na conexão.
+        """
+
+        try:
+            if "erro" in tarefa:
+                resposta = {"id": tarefa["id"], "erro": tarefa["erro"]}
+            else:
+                resposta = {"id": tarefa["id"], "resultado": await self.executa(tarefa)}
+        except Exception as erro:
+            resposta = {"id": tarefa["id"], "erro": f"{type(erro).__name__}: {erro}"}
+
+        async with trava:
+            try:
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await escritor.drain()
+            except ConnectionError:
+                pass
+
+    async def executa(self, tarefa):
+        """
+        Escolhe onde uma tarefa roda: no agrupador, no laço de eventos ou no pool de processos.
+        """
+
+        cifra, operacao = tarefa.get("cipher"), tarefa.get("operation")
+        if cifra == "shift" and operacao in ("cifra", "decifra"):
+            deslocamento = int(tarefa["key"]) % 26
+            if not isinstance(tarefa["text"], str):
+                raise TypeError("O texto deve ser uma string.")
+            return await self.agrupador.cifra(tarefa["text"], deslocamento if operacao == "cifra" else -deslocamento)
+
+        if operacao != "quebra":
+            return lote.executa(tarefa)
+
+        # Pedidos de quebra já ocupam uma vaga, liberada quando o processo termina, mesmo após o tempo limite.
+        try:
+            tempo_limite = min(float(tarefa.get("tempo_limite", self.tempo_limite)), self.tempo_limite)
+            tarefa["tempo_limite"] = tempo_limite
+            futuro = asyncio.get_running_loop().run_in_executor(self.executor, lote.executa, tarefa)
+        except BaseException:
+            self.vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self.vagas.release())
+        try:
+            # Uma pequena folga, já que a própria busca também para no tempo limite.
+            return await asyncio.wait_for(asyncio.shield(futuro), tempo_limite + 1.0)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"A quebra passou do tempo limite de {tempo_limite} s.") from None
+
+
+async def serve(endereco="127.0.0.1", porta=8765, **opcoes):
+    """
+    Roda o serviço até ser interrompido.
+
+    Parâmetros:
+    - endereco, porta: onde o servidor escuta.
+    - opcoes: parâmetros repassados para Servico.
+    """
+
+    servico = Servico(**opcoes)
+    servidor = await servico.inicia(endereco, porta)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        servico.encerra()
+
+
+def percentil(valores, p):
+    """
+    Retorna o percentil p (entre 0 e 100) de uma lista de valores já ordenada.
+    """
+
+    if not valores:
+        return None
+    return valores[min(int(len(valores) * p / 100), len(valores) - 1)]
+
+
+async def gera_carga(tarefa, requisicoes=10000, conexoes=10, janela=64, endereco="127.0.0.1", porta=8765):
+    """
+    Gerador de carga: envia a mesma tarefa muitas vezes, por várias conexões,
+    com no máximo janela pedidos sem resposta por conexão, e mede a latência de cada um.
+
+    Parâmetros:
+    - tarefa: a tarefa enviada (um dicionário no formato de lote.py, sem "id").
+    - requisicoes: total de pedidos (pelo menos 1).
+    - conexoes: quantas conexões simultâneas (no máximo uma por pedido).
+    - janela: quantos pedidos cada conexão mantém sem resposta.
+    - endereco, porta: onde o servidor escuta.
+
+    Retorna:
+    - um dicionário com a quantidade de pedidos e erros, a vazão (pedidos por segundo) e as latências p50 e p99, em ms.
+    """
+
+    if requisicoes < 1 or conexoes < 1 or janela < 1:
+        raise ValueError("requisicoes, conexoes e janela devem ser pelo menos 1.")
+    conexoes = min(conexoes, requisicoes)
+    latencias = []
+    erros = 0
+
+    async def conexao(quantidade, primeiro):
+        leitor, escritor = await asyncio.open_connection(endereco, porta, limit=1 << 26)
+        enviados = {}
+        livres = asyncio.Semaphore(janela)
+
+        async def recebe():
+            nonlocal erros
+            for _ in range(quantidade):
+                resposta = json.loads(await leitor.readline())
+                latencias.append(time.perf_counter() - enviados.pop(resposta["id"]))
+                erros += "erro" in resposta
+                livres.release()
+
+        recebendo = asyncio.create_task(recebe())
+        for identificador in range(primeiro, primeiro + quantidade):
+            await livres.acquire()
+            enviados[identificador] = time.perf_counter()
+            escritor.write(json.dumps(dict(tarefa, id=identificador)).encode("utf-8") + b"\n")
+            await escritor.drain()
+        await recebendo
+        escritor.close()
+
+    por_conexao = [requisicoes // conexoes + (i < requisicoes % conexoes) for i in range(conexoes)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexao(quantidade, sum(por_conexao[:i])) for i, quantidade in enumerate(por_conexao)))
+    segundos = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "segundos": segundos,
+        "vazao": len(latencias) / segundos,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+
+def main():
+    """
+    Inicia o servidor ou o gerador de carga pela linha de comando.
+    Exemplos:
+    python servico.py servidor --porta 8765
+    python servico.py carga --cipher shift --operation cifra --key 3 --text "ola mundo" --requisicoes 100000
+    """
+
+    parser = argparse.ArgumentParser(prog="servico.py", description="Serviço asyncio das cifras e gerador de carga.")
+    parser.add_argument("--endereco", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    servidor = comandos.add_parser("servidor", help="inicia o servidor")
+    servidor.add_argument("--processos", type=int, default=None, help="processos para as quebras")
+    servidor.add_argument("--capacidade", type=int, default=None, help="quebras pendentes ao mesmo tempo")
+    servidor.add_argument("--tempo-limite", type=float, default=30.0, help="tempo máximo de cada quebra, em segundos")
+    servidor.add_argument("--max-lote", type=int, default=1024, help="pedidos por lote de cifra por deslocamento")
+    servidor.add_argument("--espera", type=float, default=0.002, help="espera máxima para formar um lote, em segundos")
+
+    carga = comandos.add_parser("carga", help="gera carga e mede latência e vazão")
+    carga.add_argument("--cipher", default="shift", choices=sorted(lote.modulos))
+    carga.add_argument("--operation", default="cifra", choices=["cifra", "decifra", "quebra"])
+    carga.add_argument("--key", default="3")
+    carga.add_argument("--text", default="ESTE TEXTO SOBRE A CASA FALA DA HISTORIA DE UM POVO")
+    carga.add_argument("--requisicoes", type=int, default=10000)
+    carga.add_argument("--conexoes", type=int, default=10)
+    carga.add_argument("--janela", type=int, default=64, help="pedidos sem resposta por conexão")
+    args = parser.parse_args()
+
+    if args.comando == "servidor":
+        try:
+            asyncio.run(serve(args.endereco, args.porta, processos=args.processos, capacidade=args.capacidade,
+                              tempo_limite=args.tempo_limite, max_lote=args.max_lote, espera=args.espera))
+        except KeyboardInterrupt:
+            pass
+    else:
+        tarefa = {"cipher": args.cipher, "operation": args.operation, "key": args.key, "text": args.text}
+        try:
+            resultado = asyncio.run(gera_carga(tarefa, args.requisicoes, args.conexoes, args.janela,
+                                               args.endereco, args.porta))
+        except ValueError as erro:
+            carga.error(str(erro))
+        print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
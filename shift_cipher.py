@@ -1,7 +1,100 @@
+import argparse
+import math
+import mmap
+import numbers
+import sys
+import time
+from collections import Counter
+from functools import partial
+from itertools import accumulate
+
+from modelo_linguagem import frequencias_ingles, frequencias_portugues, modelo
+from texto import Texto
+
+try:
+    import numpy as np
+except ImportError:                                                                     # numpy é opcional, sem ele o lote usa Python puro
+    np = None
+
 letras_para_numeros = {chr(i): i - ord('A') for i in range(ord('A'), ord('Z') + 1)}     # dicionario que mapeia letras em numeros de 0 a 25
 numeros_para_letras = {n: l for l, n in letras_para_numeros.items()}                    # dicionario que mapeia numeros de 0 a 25 em letras
 
 
+def monta_tabela_str(deslocamento):
+    """
+    Monta a tabela de tradução de um deslocamento para textos do tipo str.
+
+    Parâmetros:
+    - deslocamento: quantas posições cada letra será deslocada.
+
+    Retorna:
+    - tabela: dicionário para str.translate, levando maiúsculas e minúsculas na letra maiúscula deslocada.
+    """
+
+    tabela = {}
+    for letra, numero in letras_para_numeros.items():
+        nova_letra = numeros_para_letras[(numero + deslocamento) % 26]
+        tabela[ord(letra)] = nova_letra
+        tabela[ord(letra.lower())] = nova_letra
+    return tabela
+
+
+def monta_tabela_bytes(deslocamento):
+    """
+    Monta a tabela de tradução de um deslocamento para textos do tipo bytes.
+
+    Parâmetros:
+    - deslocamento: quantas posições cada letra será deslocada.
+
+    Retorna:
+    - tabela: tabela de 256 bytes para bytes.translate.
+    """
+
+    tabela = bytearray(range(256))
+    for letra, numero in letras_para_numeros.items():
+        nova_letra = ord(numeros_para_letras[(numero + deslocamento) % 26])
+        tabela[ord(letra)] = nova_letra
+        tabela[ord(letra.lower())] = nova_letra
+    return bytes(tabela)
+
+
+tabelas_str = [monta_tabela_str(d) for d in range(26)]                                   # tabelas de tradução de str para cada deslocamento
+tabelas_bytes = [monta_tabela_bytes(d) for d in range(26)]                               # tabelas de tradução de bytes para cada deslocamento
+tabelas_codigos = [bytes((c + d) % 26 if c < 26 else c for c in range(256)) for d in range(26)]   # tabelas de tradução dos códigos de um Texto
+# as 26 tabelas de bytes como uma matriz (26, 256), para o lote vetorizado
+matriz_tabelas = np.frombuffer(b"".join(tabelas_bytes), dtype=np.uint8).reshape(26, 256) if np is not None else None
+
+
+def aplica_deslocamento(texto, deslocamento):
+    """
+    Desloca todas as letras de um texto em uma única passada, usando as tabelas pré-calculadas.
+    Espaços são mantidos e letras minúsculas viram maiúsculas, como em new_letra.
+
+    Parâmetros:
+    - texto: a mensagem, como str, bytes, bytearray, memoryview ou Texto.
+    - deslocamento: quantas posições cada letra será deslocada (negativo para decifrar).
+
+    Retorna:
+    - o texto deslocado, do mesmo tipo da entrada (bytes para memoryview).
+    """
+
+    deslocamento %= 26
+    if isinstance(texto, Texto):
+        return texto.com_codigos(texto.bytes().translate(tabelas_codigos[deslocamento]))
+    if isinstance(texto, str):
+        # Textos ASCII passam pela tabela de bytes, bem mais rápida que a de dicionário.
+        if texto.isascii():
+            return texto.encode("ascii").translate(tabelas_bytes[deslocamento]).decode("ascii")
+        return texto.translate(tabelas_str[deslocamento])
+    if isinstance(texto, memoryview):
+        texto = texto.tobytes()
+    return texto.translate(tabelas_bytes[deslocamento])
+
+
+perfis = {idioma: [frequencias[letra] / sum(frequencias.values()) for letra in letras_para_numeros]   # proporção de A até Z em cada idioma
+          for idioma, frequencias in (("pt", frequencias_portugues), ("en", frequencias_ingles))}
+
+
 def shift_cipher(plaintext, deslocamento):           
     """
     Criptografa uma mensagem desejada, utilizando substituição moalfabética.
@@ -14,10 +107,8 @@ def shift_cipher(plaintext, deslocamento):
     - ciphertext: a mensagem cifrada.
     """
 
-    ciphertext = ""
-    for letra in plaintext:                                                                       
-        ciphertext += new_letra(letra, deslocamento)        
-    return ciphertext                                           
+    ciphertext = aplica_deslocamento(plaintext, deslocamento)
+    return ciphertext
 
 
 def new_letra(letra, deslocamento):      
@@ -40,60 +131,443 @@ def new_letra(letra, deslocamento):
     return nova_letra                                           
 
 
-def forca_bruta(ciphertext):       
+def forca_bruta(ciphertext, cache=None):       
     """
     Descriptografa uma mensagem utilizando a técnica de força bruta.
+    Para textos longos, prefira ranqueia_deslocamentos, que não decifra as 25 possibilidades.
 
     Parâmetros:
     - ciphertext: o texto criptografado.
+    - cache: um cache.Cache; se o mesmo texto já foi quebrado, o resultado guardado é retornado (opcional).
 
     Retorna:
     - mensagens: uma lista que associa cada possível deslocamento com uma mensagem original.
     """   
 
-    mensagens = []                        
-    for deslocamento in range(1,26):                              
-        plaintext = ""
-        for letra in ciphertext:
-            plaintext += new_letra(letra, -(deslocamento))
+    if isinstance(ciphertext, Texto):
+        ciphertext = ciphertext.letras()
+    if cache is not None:
+        # As mensagens mantêm os espaços e as minúsculas do texto, então o texto não é normalizado.
+        return cache.obtem("shift_cipher.forca_bruta", ciphertext, None, lambda: forca_bruta(ciphertext))
+
+    mensagens = []
+    for deslocamento in range(1,26):
+        plaintext = aplica_deslocamento(ciphertext, -(deslocamento))
         mensagens.append((deslocamento, plaintext))
-    return mensagens                                            
+    return mensagens
             
 
-def distribuicao_frequencia(ciphertext):                                
+def histograma(texto):
     """
-    Descriptografa uma mensagem utilizando a técnica de distribuição de frequências. 
-    Assume que tanto 'a' quanto 'e' ou 'o' podem ser a letra de maior frequência.
+    Conta quantas vezes cada letra aparece no texto, sem diferenciar maiúsculas e minúsculas.
+
+    Parâmetros:
+    - texto: a mensagem, como str, bytes, bytearray ou Texto.
+
+    Retorna:
+    - contagem: lista com 26 posições, a contagem de A até Z.
+    """
+
+    if isinstance(texto, Texto):
+        codigos = texto.bytes()
+        return [codigos.count(numero) for numero in range(26)]
+    if isinstance(texto, str):
+        if not texto.isascii():
+            letras = Counter(texto.upper())
+            return [letras[letra] for letra in letras_para_numeros]
+        texto = texto.encode("ascii")
+    return [texto.count(ord(letra)) + texto.count(ord(letra.lower())) for letra in letras_para_numeros]
+
+
+def pontua_deslocamentos(contagem, idioma="pt"):
+    """
+    Calcula o qui-quadrado de cada deslocamento contra as frequências do idioma.
+    Quanto menor o valor, mais o texto decifrado se parece com o idioma.
+
+    Parâmetros:
+    - contagem: histograma de 26 posições do texto cifrado.
+    - idioma: chave do perfil de frequências em perfis ("pt" ou "en").
+
+    Retorna:
+    - scores: lista com 26 posições, o qui-quadrado de cada deslocamento.
+    """
+
+    total = sum(contagem)
+    if total == 0:
+        return [0.0] * 26
+    esperado = [proporcao * total for proporcao in perfis[idioma]]
+    scores = []
+    for deslocamento in range(26):
+        qui_quadrado = 0.0
+        for numero, observado in enumerate(contagem):
+            e = esperado[(numero - deslocamento) % 26]
+            qui_quadrado += (observado - e) ** 2 / e
+        scores.append(qui_quadrado)
+    return scores
+
+
+def ranqueia_deslocamentos(ciphertext, k=3, idioma="pt", metodo="qui_quadrado"):
+    """
+    Descobre os deslocamentos mais prováveis contando as letras uma única vez.
+    Nenhum texto é decifrado, use decifra para os deslocamentos escolhidos.
 
     Parâmetros:
     - ciphertext: o texto criptografado.
+    - k: quantos deslocamentos devem ser retornados.
+    - idioma: chave do perfil de frequências em perfis ("pt" ou "en").
+    - metodo: "qui_quadrado" (menor é melhor) ou "verossimilhanca", a log-verossimilhança
+      pelos monogramas do modelo de linguagem (maior é melhor).
 
     Retorna:
-    - mensagens: uma lista que associa o deslocamento com a mensagem original.
+    - ranking: uma lista com os k melhores deslocamentos e seus scores, do melhor para o pior.
     """
-    
-    sem_espaco = ciphertext.replace(" ", "")
 
-    letra_frequente = max(set(sem_espaco), key=sem_espaco.count)            
-    desloc_a = (letras_para_numeros[letra_frequente.upper()] -  0) % 26    
-    desloc_e = (letras_para_numeros[letra_frequente.upper()] -  4) % 26     
-    desloc_o = (letras_para_numeros[letra_frequente.upper()] - 14) % 26     
-    
-    plaintext_a = ""
-    plaintext_e = ""
-    plaintext_o = ""
+    contagem = histograma(ciphertext)
+    if metodo == "verossimilhanca":
+        scores = modelo(idioma).verossimilhanca_deslocamentos(contagem)
+        ranking = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+    else:
+        scores = pontua_deslocamentos(contagem, idioma)
+        ranking = sorted(enumerate(scores), key=lambda x: x[1])
+    return ranking[:k]
+
 
-    for letra in ciphertext:
-        plaintext_a += new_letra(letra, -(desloc_a))
-        plaintext_e += new_letra(letra, -(desloc_e))
-        plaintext_o += new_letra(letra, -(desloc_o))
+def decifra(ciphertext, deslocamento):
+    """
+    Descriptografa uma mensagem com um deslocamento conhecido.
 
-    mensagens = [(desloc_a, plaintext_a),
-                 (desloc_e, plaintext_e),
-                 (desloc_o, plaintext_o)]
+    Parâmetros:
+    - ciphertext: o texto criptografado.
+    - deslocamento: o deslocamento usado para criptografar.
+
+    Retorna:
+    - plaintext: a mensagem original.
+    """
+
+    plaintext = aplica_deslocamento(ciphertext, -(deslocamento))
+    return plaintext
+
+
+def distribuicao_frequencia(ciphertext, idioma="pt", candidatos=3, decifrar=True):
+    """
+    Descriptografa uma mensagem utilizando a técnica de distribuição de frequências.
+    Conta as letras uma única vez e compara a distribuição inteira com a do idioma em cada deslocamento.
+
+    Parâmetros:
+    - ciphertext: o texto criptografado.
+    - idioma: chave do perfil de frequências em perfis ("pt" ou "en").
+    - candidatos: quantos deslocamentos devem ser retornados.
+    - decifrar: se False, nenhuma mensagem é decifrada e cada deslocamento vem com seu qui-quadrado.
 
+    Retorna:
+    - mensagens: uma lista que associa o deslocamento com a mensagem original, do mais provável para o menos.
+    """
+
+    if isinstance(ciphertext, Texto):
+        ciphertext = ciphertext.letras()
+    ranking = ranqueia_deslocamentos(ciphertext, candidatos, idioma)
+    if not decifrar:
+        return ranking
+
+    mensagens = [(deslocamento, decifra(ciphertext, deslocamento)) for deslocamento, _ in ranking]
     return mensagens
 
+
+def confianca_deslocamentos(contagem, idioma="pt", temperatura=2.0):
+    """
+    Calcula a probabilidade a posteriori de cada deslocamento, com todos igualmente prováveis a priori,
+    a partir das log-verossimilhanças dos monogramas do modelo de linguagem.
+    O modelo trata as letras como independentes, o que elas não são, e sozinho fica confiante demais;
+    por isso as log-verossimilhanças são divididas por temperatura. Com 2, medido em trechos de prosa em português,
+    as respostas com probabilidade acima de 0.9999 estavam todas certas, o que com 1 não acontecia.
+    A probabilidade é uma medida heurística de confiança, não uma garantia.
+
+    Parâmetros:
+    - contagem: histograma de 26 posições do texto cifrado.
+    - idioma: o idioma do modelo de linguagem.
+    - temperatura: quanto as log-verossimilhanças são atenuadas (1 as usa como estão).
+
+    Retorna:
+    - probabilidades: lista com 26 posições, a probabilidade de cada deslocamento (somam 1).
+    """
+
+    scores = modelo(idioma).verossimilhanca_deslocamentos(contagem)
+    maior = max(scores)
+    # Os scores são log10; subtrair o maior evita que os pesos estourem ou zerem em textos longos.
+    pesos = [math.exp((score - maior) * math.log(10) / temperatura) for score in scores]
+    total = sum(pesos)
+    return [peso / total for peso in pesos]
+
+
+def distribuicao_incremental(blocos, idioma="pt", confianca=0.9999, minimo_letras=50, tamanho_bloco=1 << 8,
+                             temperatura=2.0):
+    """
+    Descobre o deslocamento de um texto lido aos poucos, parando assim que a evidência basta.
+    Mantém um histograma acumulado das letras e, depois de cada bloco, recalcula a probabilidade
+    de cada deslocamento; a leitura para quando a do melhor passa de confianca.
+    Assim, o tempo depende de quanto texto é preciso para decidir, não do tamanho da entrada.
+
+    Parâmetros:
+    - blocos: um iterável de blocos (str, bytes ou Texto) ou um arquivo aberto, lido em blocos de tamanho_bloco.
+    - idioma: o idioma do modelo de linguagem.
+    - confianca: a probabilidade a posteriori do melhor deslocamento que encerra a leitura.
+    - minimo_letras: quantas letras, no mínimo, são lidas antes de parar.
+    - tamanho_bloco: tamanho de cada leitura, quando blocos é um arquivo. A confiança é conferida a cada bloco,
+      então blocos pequenos param mais perto do necessário.
+    - temperatura: a atenuação das log-verossimilhanças, como em confianca_deslocamentos.
+
+    Retorna:
+    - deslocamento: o deslocamento mais provável.
+    - probabilidade: a probabilidade a posteriori desse deslocamento.
+    - consumidos: quantos bytes (caracteres, para blocos str) foram lidos.
+    """
+
+    if hasattr(blocos, "read"):
+        blocos = iter(partial(blocos.read, tamanho_bloco), blocos.read(0))
+
+    contagem = [0] * 26
+    consumidos = 0
+    deslocamento, probabilidade = 0, 1 / 26
+    for bloco in blocos:
+        consumidos += len(bloco)
+        contagem = [total + parcial for total, parcial in zip(contagem, histograma(bloco))]
+        if sum(contagem) == 0:
+            continue
+        probabilidades = confianca_deslocamentos(contagem, idioma, temperatura)
+        probabilidade = max(probabilidades)
+        deslocamento = probabilidades.index(probabilidade)
+        if probabilidade >= confianca and sum(contagem) >= minimo_letras:
+            break
+    return deslocamento, probabilidade, consumidos
+
+
+def empacota(mensagens):
+    """
+    Junta várias mensagens em um único buffer de bytes, guardando onde cada uma começa.
+
+    Parâmetros:
+    - mensagens: uma lista de mensagens (str).
+
+    Retorna:
+    - buffer: as mensagens concatenadas em UTF-8 (array uint8 com numpy, bytes sem numpy).
+    - offsets: posição inicial de cada mensagem no buffer, mais o tamanho total no final.
+    """
+
+    texto = "".join(mensagens)
+    if texto.isascii():
+        buffer = texto.encode("ascii")
+        tamanhos = map(len, mensagens)
+    else:
+        codificadas = [mensagem.encode("utf-8") for mensagem in mensagens]
+        buffer = b"".join(codificadas)
+        tamanhos = map(len, codificadas)
+    offsets = list(accumulate(tamanhos, initial=0))
+    if np is not None:
+        return np.frombuffer(buffer, dtype=np.uint8), np.array(offsets, dtype=np.int64)
+    return buffer, offsets
+
+
+def desempacota(buffer, offsets):
+    """
+    Separa um buffer produzido por empacota de volta em mensagens.
+
+    Parâmetros:
+    - buffer: as mensagens concatenadas (array uint8 ou bytes).
+    - offsets: posição inicial de cada mensagem no buffer, mais o tamanho total no final.
+
+    Retorna:
+    - mensagens: uma lista de mensagens (str).
+    """
+
+    if np is not None and isinstance(buffer, np.ndarray):
+        buffer = buffer.tobytes()
+    offsets = [int(o) for o in offsets]
+    if buffer.isascii():
+        texto = buffer.decode("ascii")
+        return [texto[inicio:fim] for inicio, fim in zip(offsets, offsets[1:])]
+    return [buffer[inicio:fim].decode("utf-8") for inicio, fim in zip(offsets, offsets[1:])]
+
+
+def _desloca_vetor(buffer, deslocamentos):
+    """
+    Aplica deslocamentos a um array de bytes consultando as tabelas pré-calculadas de forma vetorizada.
+
+    Parâmetros:
+    - buffer: array uint8 com o texto.
+    - deslocamentos: array com o deslocamento de cada byte, ou uma matriz (k, 1) para k deslocamentos.
+
+    Retorna:
+    - um array uint8 com as letras deslocadas (uma linha por deslocamento, no caso da matriz).
+    """
+
+    return matriz_tabelas[np.asarray(deslocamentos) % 26, buffer]
+
+
+def cifra_lote(mensagens, deslocamentos):
+    """
+    Criptografa muitas mensagens de uma vez, cada uma com seu próprio deslocamento.
+    Com numpy as mensagens são processadas juntas em um único array, sem numpy cada uma usa a tabela pré-calculada.
+
+    Parâmetros:
+    - mensagens: uma lista de mensagens.
+    - deslocamentos: um deslocamento para todas (int ou um inteiro do numpy)
+      ou uma lista com o deslocamento de cada mensagem.
+
+    Retorna:
+    - ciphertexts: uma lista com as mensagens cifradas.
+    """
+
+    if isinstance(deslocamentos, numbers.Integral):
+        deslocamentos = [deslocamentos] * len(mensagens)
+    if len(deslocamentos) != len(mensagens):
+        raise ValueError("É preciso um deslocamento para cada mensagem.")
+
+    if np is None or any(isinstance(m, Texto) for m in mensagens):
+        return [aplica_deslocamento(m, d) for m, d in zip(mensagens, deslocamentos)]
+
+    buffer, offsets = empacota(mensagens)
+    return desempacota(cifra_empacotado(buffer, offsets, deslocamentos), offsets)
+
+
+def cifra_empacotado(buffer, offsets, deslocamentos):
+    """
+    Criptografa um lote já empacotado, sem converter as mensagens de volta para str.
+    Útil quando o lote é cifrado mais de uma vez ou enviado adiante como bytes.
+
+    Parâmetros:
+    - buffer: as mensagens concatenadas, como retornado por empacota.
+    - offsets: posição inicial de cada mensagem no buffer, mais o tamanho total no final.
+    - deslocamentos: uma lista com o deslocamento de cada mensagem.
+
+    Retorna:
+    - o buffer cifrado, do mesmo tipo da entrada.
+    """
+
+    if np is None:
+        offsets = list(offsets)
+        partes = [aplica_deslocamento(buffer[inicio:fim], d)
+                  for inicio, fim, d in zip(offsets, offsets[1:], deslocamentos)]
+        return b"".join(partes)
+
+    por_byte = np.repeat(np.asarray(deslocamentos, dtype=np.int64) % 26, np.diff(offsets))
+    return _desloca_vetor(np.asarray(buffer, dtype=np.uint8), por_byte)
+
+
+def forca_bruta_lote(mensagens):
+    """
+    Gera as 25 possibilidades da força bruta para um lote inteiro de mensagens de uma só vez.
+
+    Parâmetros:
+    - mensagens: uma lista de textos cifrados.
+
+    Retorna:
+    - candidatos: a linha d - 1 contém o lote inteiro decifrado com o deslocamento d
+      (matriz uint8 de 25 linhas com numpy, lista de 25 bytes sem numpy).
+    - offsets: posição inicial de cada mensagem em uma linha, mais o tamanho total no final.
+    """
+
+    buffer, offsets = empacota(mensagens)
+    if np is None:
+        candidatos = [aplica_deslocamento(buffer, -(d)) for d in range(1, 26)]
+        return candidatos, offsets
+
+    deslocamentos = -np.arange(1, 26).reshape(25, 1)
+    return _desloca_vetor(buffer, deslocamentos), offsets
+
+
+def cifra_arquivo(origem, destino, deslocamento, tamanho_bloco=1 << 20, usar_mmap=False):
+    """
+    Criptografa um arquivo inteiro em blocos de tamanho fixo, com memória constante.
+    Como o deslocamento é feito letra a letra, cifrar por blocos dá o mesmo resultado que cifrar tudo de uma vez.
+
+    Parâmetros:
+    - origem: caminho do arquivo original.
+    - destino: caminho do arquivo cifrado.
+    - deslocamento: quantas posições cada letra será deslocada (negativo para decifrar).
+    - tamanho_bloco: quantos bytes são lidos por vez.
+    - usar_mmap: se True, lê o arquivo original por mmap em vez de read.
+
+    Retorna:
+    - total: quantidade de bytes processados.
+    - vazao: velocidade de processamento em MB/s.
+    """
+
+    tabela = tabelas_bytes[deslocamento % 26]
+    total = 0
+    inicio = time.perf_counter()
+
+    with open(origem, "rb") as entrada, open(destino, "wb") as saida:
+        if usar_mmap and entrada.seek(0, 2) > 0:
+            with mmap.mmap(entrada.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                for posicao in range(0, len(mapa), tamanho_bloco):
+                    bloco = mapa[posicao:posicao + tamanho_bloco]
+                    saida.write(bloco.translate(tabela))
+                    total += len(bloco)
+        else:
+            entrada.seek(0)
+            while bloco := entrada.read(tamanho_bloco):
+                saida.write(bloco.translate(tabela))
+                total += len(bloco)
+
+    segundos = time.perf_counter() - inicio
+    vazao = total / (1 << 20) / segundos if segundos > 0 else 0.0
+    return total, vazao
+
+
+def decifra_arquivo(origem, destino, deslocamento, tamanho_bloco=1 << 20, usar_mmap=False):
+    """
+    Descriptografa um arquivo inteiro em blocos de tamanho fixo, com memória constante.
+
+    Parâmetros:
+    - origem: caminho do arquivo cifrado.
+    - destino: caminho do arquivo decifrado.
+    - deslocamento: o deslocamento usado para criptografar.
+    - tamanho_bloco: quantos bytes são lidos por vez.
+    - usar_mmap: se True, lê o arquivo cifrado por mmap em vez de read.
+
+    Retorna:
+    - total: quantidade de bytes processados.
+    - vazao: velocidade de processamento em MB/s.
+    """
+
+    return cifra_arquivo(origem, destino, -(deslocamento), tamanho_bloco, usar_mmap)
+
+
+def linha_de_comando(argumentos):
+    """
+    Cifra, decifra ou quebra arquivos sem passar pelo menu interativo.
+    Exemplos: python shift_cipher.py cifra entrada.txt saida.txt 3
+              python shift_cipher.py quebra interceptado.txt
+
+    Parâmetros:
+    - argumentos: a lista de argumentos da linha de comando, sem o nome do programa.
+    """
+
+    parser = argparse.ArgumentParser(prog="shift_cipher.py", description="Substituição monoalfabética de arquivos.")
+    parser.add_argument("operacao", choices=["cifra", "decifra", "quebra"])
+    parser.add_argument("origem")
+    parser.add_argument("destino", nargs="?")
+    parser.add_argument("deslocamento", type=int, nargs="?")
+    parser.add_argument("--bloco", type=int, default=None, help="tamanho do bloco em bytes")
+    parser.add_argument("--mmap", action="store_true", help="lê o arquivo de origem por mmap")
+    parser.add_argument("--idioma", default="pt", help="idioma da quebra")
+    parser.add_argument("--confianca", type=float, default=0.9999, help="probabilidade que encerra a leitura na quebra")
+    args = parser.parse_args(argumentos)
+
+    if args.operacao == "quebra":
+        with open(args.origem, "rb") as entrada:
+            deslocamento, probabilidade, consumidos = distribuicao_incremental(entrada, args.idioma, args.confianca,
+                                                                               tamanho_bloco=args.bloco or 1 << 8)
+        print(f"deslocamento {deslocamento} com probabilidade {probabilidade:.6f}, {consumidos} bytes lidos")
+        return
+    if args.destino is None or args.deslocamento is None:
+        parser.error("cifra e decifra precisam de destino e deslocamento")
+
+    operacao = cifra_arquivo if args.operacao == "cifra" else decifra_arquivo
+    total, vazao = operacao(args.origem, args.destino, args.deslocamento, args.bloco or 1 << 20, args.mmap)
+    print(f"{total / (1 << 20):.2f} MB processados a {vazao:.2f} MB/s")
+
+
 def main():
     """
     Função principal que coleta entradas do usuário e chama as funções do programa.
@@ -146,4 +620,9 @@ def main():
                 print("Você deve escolher entre (1), (2), (3) ou (4). Tente novamente!")
                 pausa = input("Digite (0) para voltar ao menu: ")
 
-main()
\ No newline at end of file
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        linha_de_comando(sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Os módulos ficam na raiz do repositório, sem pacote.
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if raiz not in sys.path:
+    sys.path.insert(0, raiz)
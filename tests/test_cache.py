@@ -0,0 +1,47 @@
+import cache
+import columnar_transposition
+import rail_fence
+
+
+def test_acerto_igual_a_falha_nas_quebras(tmp_path):
+    guardado = cache.Cache(tmp_path / "cache.db")
+    cifrado_rail = rail_fence.rail_fence("ATAQUE AO AMANHECER PELO FLANCO", 4)
+    cifrado_colunar = columnar_transposition.transposition_cipher("ATAQUE AO AMANHECER", "CHAVE")
+
+    primeiro_rail = rail_fence.quebra_cifra(cifrado_rail, 10, cache=guardado)
+    primeiro_colunar = columnar_transposition.quebra_cifra(cifrado_colunar, 6, cache=guardado)
+    assert guardado.estatisticas()["falhas"] == 2
+    assert rail_fence.quebra_cifra(cifrado_rail, 10, cache=guardado) == primeiro_rail == \
+        rail_fence.quebra_cifra(cifrado_rail, 10)
+    assert columnar_transposition.quebra_cifra(cifrado_colunar, 6, cache=guardado) == primeiro_colunar == \
+        columnar_transposition.quebra_cifra(cifrado_colunar, 6)
+    assert guardado.estatisticas()["acertos_memoria"] == 2
+
+
+def test_parametros_diferentes_nao_colidem():
+    guardado = cache.Cache()
+    assert rail_fence.quebra_cifra("ABCDEFGH", 4, cache=guardado) != rail_fence.quebra_cifra("ABCDEFGH", 6, cache=guardado)
+    assert guardado.estatisticas()["falhas"] == 2
+
+
+def test_disco_sobrevive_ao_fechamento(tmp_path):
+    caminho = tmp_path / "cache.db"
+    primeiro = cache.Cache(caminho)
+    calculado = primeiro.obtem("teste", "ABC", {"n": 1}, lambda: [(1, "ABC")])
+    primeiro.fecha()
+
+    segundo = cache.Cache(caminho)
+    assert segundo.obtem("teste", "ABC", {"n": 1}, lambda: None) == calculado
+    assert segundo.estatisticas()["acertos_disco"] == 1
+    segundo.fecha()
+
+
+def test_limites_de_memoria_e_disco(tmp_path):
+    guardado = cache.Cache(tmp_path / "cache.db", max_itens=2, max_bytes=600)
+    for i in range(10):
+        guardado.obtem("teste", str(i), None, lambda: "x" * 100)
+    estatisticas = guardado.estatisticas()
+    assert estatisticas["itens_memoria"] == 2
+    assert estatisticas["bytes_disco"] <= 600
+    assert estatisticas["removidos"] > 0
+    guardado.fecha()
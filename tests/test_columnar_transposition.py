@@ -0,0 +1,114 @@
+import random
+import subprocess
+import sys
+from itertools import permutations
+
+import pytest
+
+import columnar_transposition
+import instrumentacao
+from conftest import raiz
+
+
+def colunas_aleatorias(quantidade, linhas, semente):
+    sorteio = random.Random(semente)
+    return ["".join(sorteio.choice("AEIOSRNDMTCU") for _ in range(linhas)) for _ in range(quantidade)]
+
+
+@pytest.mark.parametrize("quantidade", [2, 3, 5, 6])
+def test_busca_exaustiva_igual_a_todas_as_permutacoes(quantidade):
+    bi, tri = columnar_transposition.matriz_pontuacao(colunas_aleatorias(quantidade, 8, quantidade))
+    score, ordem = columnar_transposition.busca_exaustiva(bi, tri)
+    melhor = max(columnar_transposition.pontua_ordem(p, bi, tri) for p in permutations(range(quantidade)))
+    assert score == pytest.approx(melhor)
+    assert columnar_transposition.pontua_ordem(ordem, bi, tri) == pytest.approx(melhor)
+
+
+def test_lote_igual_a_cifra_individual():
+    mensagens = ["ATAQUE AO AMANHECER", "DEFESA", "A", "MENSAGEM COM DOZE"]
+    cifradas = columnar_transposition.cifra_lote(mensagens, "CHAVE")
+    assert cifradas == [columnar_transposition.transposition_cipher(m, "CHAVE") for m in mensagens]
+    decifradas = columnar_transposition.decifra_lote(cifradas, "CHAVE")
+    assert decifradas == [columnar_transposition.decifra(c, "CHAVE") for c in cifradas]
+    assert [d.rstrip("X") for d in decifradas] == [m.replace(" ", "").rstrip("X") for m in mensagens]
+
+
+def test_importar_nao_executa_o_menu():
+    codigo = "import sys; sys.argv = ['programa', '1']; import columnar_transposition"
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True, timeout=60)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout == ""
+
+
+def test_quebra_paralela_em_processos_spawn():
+    # Com spawn, cada processo importa o módulo de novo: o menu não pode ser aberto na importação.
+    codigo = ("import multiprocessing, columnar_transposition as c\n"
+              "if __name__ == '__main__':\n"
+              "    multiprocessing.set_start_method('spawn')\n"
+              "    cifrado = c.transposition_cipher('OSSOLDADOSVAOATACARAOAMANHECER', 'CHAVE')\n"
+              "    chave, mensagem, _ = c.quebra_cifra_paralela(cifrado, 6, processos=2, semente=1)[0]\n"
+              "    print(chave, mensagem)\n")
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True, timeout=120)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.split() == ["5", "OSSOLDADOSVAOATACARAOAMANHECER"]
+
+
+def test_processos_limitados_pelas_tarefas(monkeypatch):
+    criados = []
+    executor_original = columnar_transposition.ProcessPoolExecutor
+
+    def registra(processos, **opcoes):
+        criados.append(processos)
+        return executor_original(processos, **opcoes)
+
+    monkeypatch.setattr(columnar_transposition, "ProcessPoolExecutor", registra)
+    # Quatro letras só admitem a chave de 2 colunas, dividida em dois prefixos.
+    columnar_transposition.quebra_cifra_paralela("ATAQ", 3, processos=32)
+    assert criados == [2]
+
+
+@pytest.mark.parametrize("semente", range(6))
+def test_restricao_crib_igual_a_procurar_em_todas_as_permutacoes(semente):
+    sorteio = random.Random(semente)
+    bloco = ["".join(sorteio.choice("AEO") for _ in range(3)) for _ in range(4)]
+    crib = "".join(sorteio.choice("AEO") for _ in range(sorteio.randrange(2, 5)))
+    bi, tri = columnar_transposition.matriz_pontuacao(bloco)
+    validas = [p for p in permutations(range(4))
+               if crib in "".join("".join(linha) for linha in zip(*(bloco[i] for i in p)))]
+    score, ordem = columnar_transposition.busca_exaustiva(
+        bi, tri, restricao=columnar_transposition.restricao_crib(bloco, crib))
+    if not validas:
+        assert ordem is None
+    else:
+        assert tuple(ordem) in validas
+        assert score == pytest.approx(max(columnar_transposition.pontua_ordem(p, bi, tri) for p in validas))
+
+
+def test_crib_vazio_nao_restringe():
+    cifrado = columnar_transposition.transposition_cipher("ATAQUE AO AMANHECER", "CHAVE")
+    assert columnar_transposition.quebra_cifra(cifrado, 6, crib=" ") == columnar_transposition.quebra_cifra(cifrado, 6)
+    bloco = ["ABC", "DEF", "GHI"]
+    assert columnar_transposition.analise_frequencia(bloco, crib="") == columnar_transposition.analise_frequencia(bloco)
+    assert columnar_transposition.restricao_crib(bloco, "")[1]
+
+
+def test_quebra_com_crib_acha_a_chave():
+    mensagem = "OSSOLDADOSVAOATACARAOAMANHECERPELOFLANCOESQUERDOASSINADOGENERAL"
+    cifrado = columnar_transposition.transposition_cipher(mensagem, "QWERTYUIO")
+    estatisticas = instrumentacao.Estatisticas()
+    respostas = columnar_transposition.quebra_cifra(cifrado, 9, estatisticas=estatisticas, crib="ASSINADOGENERAL")
+    lidas = {chave: "".join("".join(linha) for linha in zip(*colunas)) for chave, colunas in respostas}
+    assert lidas[9] == mensagem
+    assert estatisticas.fracao_podada() > 0.99
+
+
+def test_crib_em_ciphertext_minusculo():
+    mensagem = "OSSOLDADOSVAOATACARAOAMANHECERPELOFLANCOESQUERDOASSINADOGENERAL"
+    cifrado = columnar_transposition.transposition_cipher(mensagem, "QWERTYUIO").lower()
+    respostas = columnar_transposition.quebra_cifra(cifrado, 9, crib="assinado general")
+    lidas = {chave: "".join("".join(linha) for linha in zip(*colunas)) for chave, colunas in respostas}
+    assert lidas[9] == mensagem
+    bloco = columnar_transposition.divide_texto(cifrado.replace(" ", ""), 9)
+    assert columnar_transposition.analise_frequencia(bloco, crib="ASSINADOGENERAL") is not None
@@ -0,0 +1,39 @@
+import io
+import json
+
+import pytest
+
+import lote
+
+
+def tarefas():
+    for cifra, chave in (("shift", 3), ("rail", 3), ("colunar", "CHAVE")):
+        yield {"cipher": cifra, "operation": "cifra", "key": chave, "text": "ATAQUE AO AMANHECER"}
+
+
+@pytest.mark.parametrize("tarefa", list(tarefas()), ids=lambda tarefa: tarefa["cipher"])
+def test_cifra_e_decifra_voltam_ao_texto(tarefa):
+    cifrado = lote.executa(tarefa)
+    decifrado = lote.executa(dict(tarefa, operation="decifra", text=cifrado))
+    assert decifrado.replace(" ", "").rstrip("X") == "ATAQUEAOAMANHECER"
+
+
+def test_erro_numa_tarefa_nao_interrompe_as_outras():
+    linhas = [json.dumps({"id": "a", "cipher": "shift", "operation": "cifra", "key": 1, "text": "ABC"}),
+              "isto não é json",
+              json.dumps({"cipher": "enigma", "operation": "cifra", "key": 1, "text": "ABC"})]
+    respostas = [json.loads(resposta) for resposta in lote.executa_linhas(linhas)]
+    assert respostas[0] == {"id": "a", "resultado": "BCD"}
+    assert respostas[1]["id"] == 1 and "erro" in respostas[1]
+    assert respostas[2]["id"] == 2 and "Cifra desconhecida" in respostas[2]["erro"]
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_processa_mantem_a_ordem_entre_blocos(processos):
+    linhas = [json.dumps({"cipher": "shift", "operation": "cifra", "key": i % 26, "text": "ABC"}) for i in range(50)]
+    saida = io.StringIO()
+    total = lote.processa([io.StringIO("\n".join(linhas) + "\n\n")], saida, processos=processos, tamanho_bloco=7)
+    respostas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert total == 50
+    assert [resposta["id"] for resposta in respostas] == list(range(50))
+    assert respostas[30]["resultado"] == lote.executa(json.loads(linhas[30]))
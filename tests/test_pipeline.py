@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import columnar_transposition
+import pipeline
+import rail_fence
+import shift_cipher
+from texto import Texto
+
+cadeias = [
+    [("shift", 3), ("shift", 30)],
+    [("rail", 3)],
+    [("shift", 5), ("rail", 4), ("colunar", "CHAVE")],
+    [("colunar", "SEGREDO"), ("shift", 7), ("rail", 2)],
+    [("colunar", "ABC"), ("colunar", "LIMAO"), ("shift", 11)],
+]
+
+
+def passo_a_passo(texto, passos):
+    for tipo, chave in passos:
+        if tipo == "shift":
+            texto = shift_cipher.shift_cipher(texto, chave)
+        elif tipo == "rail":
+            texto = rail_fence.rail_fence(texto, chave)
+        else:
+            texto = columnar_transposition.transposition_cipher(texto, chave)
+    return texto
+
+
+def textos():
+    sorteio = random.Random(3)
+    for tamanho in (1, 2, 7, 15, 16, 41):
+        yield "".join(sorteio.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(tamanho))
+
+
+@pytest.mark.parametrize("passos", cadeias)
+def test_cifra_igual_a_cadeia_passo_a_passo(passos):
+    for texto in textos():
+        assert pipeline.cifra(texto, passos) == passo_a_passo(texto, passos)
+
+
+@pytest.mark.parametrize("passos", cadeias)
+def test_decifra_com_tamanho_volta_ao_texto(passos):
+    for texto in textos():
+        cifrado = pipeline.cifra(texto, passos)
+        assert pipeline.decifra(cifrado, passos, tamanho=len(texto)) == texto
+
+
+@pytest.mark.parametrize("passos", cadeias)
+def test_texto_igual_a_str(passos):
+    for texto in textos():
+        cifrado = pipeline.cifra(Texto.normaliza(texto), passos)
+        assert isinstance(cifrado, Texto)
+        assert cifrado.letras() == pipeline.cifra(texto, passos).replace(" ", "")
+        assert pipeline.decifra(cifrado, passos, tamanho=len(texto)).letras() == texto
+
+
+def test_decifra_sem_tamanho_descarta_os_x():
+    passos = [("shift", 5), ("rail", 4), ("colunar", "CHAVE")]
+    assert pipeline.decifra(pipeline.cifra("ATAQUE AO AMANHECER", passos), passos) == "ATAQUEAOAMANHECER"
+
+
+def test_tamanho_incompativel():
+    passos = [("colunar", "CHAVE")]
+    with pytest.raises(ValueError):
+        pipeline.decifra(pipeline.cifra("ATAQUE", passos), passos, tamanho=20)
+
+
+def test_quebra_recupera_deslocamento_e_rails():
+    mensagem = "OS SOLDADOS VAO ATACAR O FORTE AO AMANHECER PELO FLANCO ESQUERDO DA MURALHA"
+    cifrado = pipeline.cifra(mensagem, [("shift", 9), ("rail", 5)])
+    deslocamento, chave, decifrado, _ = pipeline.quebra(cifrado, "rail", max_chave=10, processos=1)[0]
+    assert (deslocamento, chave, decifrado) == (9, 5, mensagem.replace(" ", ""))
@@ -0,0 +1,122 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import cache
+import instrumentacao
+import modelo_linguagem
+import rail_fence
+from conftest import raiz
+
+
+def test_quebra_ranqueada_em_processos_spawn():
+    # Com spawn, cada processo importa o módulo de novo: o menu não pode ser aberto na importação.
+    codigo = ("import multiprocessing, rail_fence\n"
+              "if __name__ == '__main__':\n"
+              "    multiprocessing.set_start_method('spawn')\n"
+              "    cifrado = rail_fence.rail_fence('ATAQUEAOAMANHECERPELOFLANCOESQUERDO', 4)\n"
+              "    print(rail_fence.quebra_cifra_ranqueada(cifrado, 8, processos=2, melhores=1)[0][0])\n")
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True, timeout=120)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.split() == ["4"]
+
+
+def test_quebra_ranqueada_acha_a_quantidade_de_rails():
+    mensagem = "OS SOLDADOS VAO ATACAR O FORTE AO AMANHECER PELO FLANCO ESQUERDO DA MURALHA"
+    cifrado = rail_fence.rail_fence(mensagem, 5)
+    linhas, decifrado, _ = rail_fence.quebra_cifra_ranqueada(cifrado, 12, processos=1, melhores=1)[0]
+    assert linhas == 5
+    assert decifrado == mensagem.replace(" ", "")
+
+
+def test_processos_limitados_pelas_quantidades_de_rails(monkeypatch):
+    criados = []
+    executor_original = rail_fence.ProcessPoolExecutor
+
+    def registra(processos, **opcoes):
+        criados.append(processos)
+        return executor_original(processos, **opcoes)
+
+    monkeypatch.setattr(rail_fence, "ProcessPoolExecutor", registra)
+    cifrado = rail_fence.rail_fence("ATAQUEAOAMANHECERPELOFLANCO", 3)
+    assert rail_fence.quebra_cifra_ranqueada(cifrado, 5, processos=32, melhores=1)[0][0] == 3
+    assert criados == [3]
+
+
+def test_importar_nao_executa_linha_de_comando():
+    codigo = "import sys; sys.argv = ['programa', 'cifra', 'a', 'b', '3']; import rail_fence"
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True, timeout=60)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout == ""
+
+
+def test_arquivo_com_varias_linhas(tmp_path):
+    origem, cifrado, decifrado = tmp_path / "origem.txt", tmp_path / "cifrado.txt", tmp_path / "decifrado.txt"
+    origem.write_bytes(b"ataque ao\r\namanhecer\n\tpelo flanco\n")
+    rail_fence.cifra_arquivo(origem, cifrado, 3)
+    assert cifrado.read_bytes().decode("ascii") == rail_fence.rail_fence("ATAQUEAOAMANHECERPELOFLANCO", 3).replace(" ", "")
+    rail_fence.cifra_arquivo(cifrado, decifrado, 3, decifrar=True)
+    assert decifrado.read_bytes() == b"ATAQUEAOAMANHECERPELOFLANCO"
+
+
+def test_cache_com_espacos_igual_a_quebra_sem_cache():
+    guardado = cache.Cache()
+    assert rail_fence.quebra_cifra("A B C D", 6, cache=guardado) == rail_fence.quebra_cifra("ABCD", 6)
+    assert rail_fence.quebra_cifra("ABCD", 6, cache=guardado) == [(2, "ACBD"), (3, "ABDC")]
+    assert guardado.estatisticas()["acertos_memoria"] == 1
+
+
+def test_quebra_conjunta_pontua_cada_mensagem_sozinha():
+    mensagens = ["ATAQUEAOAMANHECER", "RECUARPELOFLANCO", "ESPERAROSREFORCOS"]
+    cifradas = [rail_fence.rail_fence(m, 3) for m in mensagens]
+    linhas, decifradas, score = rail_fence.quebra_conjunta(cifradas, 8)[0]
+    assert (linhas, decifradas) == (3, mensagens)
+    assert score == pytest.approx(modelo_linguagem.modelo("pt").pontua_mensagens(mensagens))
+    assert score != pytest.approx(modelo_linguagem.modelo("pt").pontua_por_letra("".join(mensagens)))
+
+
+def test_posicoes_iguais_a_permutacao():
+    for tamanho, linhas in [(1, 2), (7, 3), (30, 4), (31, 5), (100, 9)]:
+        ordem, inversa = rail_fence.permutacao_rail(tamanho, linhas)
+        for cifrada, original in enumerate(ordem):
+            assert rail_fence.posicao_original(cifrada, tamanho, linhas) == original
+            assert rail_fence.posicao_cifrada(original, tamanho, linhas) == cifrada
+
+
+def test_contem_crib_igual_a_procurar_no_texto_decifrado():
+    sorteio = random.Random(7)
+    for _ in range(300):
+        texto = "".join(sorteio.choice("AEZQX") for _ in range(sorteio.randrange(1, 60)))
+        linhas = sorteio.randrange(2, 9)
+        crib = "".join(sorteio.choice("AEZQX") for _ in range(sorteio.randrange(1, 5)))
+        esperado = crib in rail_fence.decifra(texto, linhas)
+        assert rail_fence.contem_crib(texto, linhas, crib) == esperado
+
+
+def test_crib_vazio_nao_restringe():
+    assert rail_fence.contem_crib("ABCDEF", 3, "")
+    assert rail_fence.quebra_cifra("ABCDEF", 5, crib="") == rail_fence.quebra_cifra("ABCDEF", 5)
+    assert rail_fence.quebra_cifra_ranqueada("ABCDEF", 5, processos=1, crib=" ") == \
+        rail_fence.quebra_cifra_ranqueada("ABCDEF", 5, processos=1)
+
+
+def test_quebra_com_crib_descarta_rails():
+    cifrado = rail_fence.rail_fence("OS SOLDADOS VAO ATACAR O FORTE AO AMANHECER", 4)
+    estatisticas = instrumentacao.Estatisticas()
+    candidatos = rail_fence.quebra_cifra(cifrado, 20, estatisticas=estatisticas, crib="FORTE")
+    assert candidatos == [(4, "OSSOLDADOSVAOATACAROFORTEAOAMANHECER")]
+    assert estatisticas.fracao_podada() == pytest.approx(17 / 18)
+
+
+def test_reordena_com_acentos_sem_guardar_a_permutacao():
+    texto = "AÇÃOÉCORAÇÃODEPORTUGUÊSCOMACENTOS"
+    for linhas in range(1, 9):
+        ordem, inversa = rail_fence.permutacao_rail(len(texto), linhas)
+        cifrado = rail_fence.reordena(texto, linhas)
+        assert cifrado == "".join(texto[i] for i in ordem)
+        assert rail_fence.reordena(cifrado, linhas, decifrar=True) == texto
+    assert not hasattr(rail_fence.permutacao_rail, "cache_info")
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import servico
+import shift_cipher
+
+tarefa = {"cipher": "shift", "operation": "cifra", "key": "3", "text": "ATAQUE AO AMANHECER"}
+
+
+async def carga_local(requisicoes, conexoes):
+    atendente = servico.Servico(processos=1)
+    servidor = await atendente.inicia("127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    try:
+        return await servico.gera_carga(tarefa, requisicoes, conexoes, janela=4, porta=porta)
+    finally:
+        servidor.close()
+        await servidor.wait_closed()
+        atendente.encerra()
+
+
+def test_gera_carga_mede_todos_os_pedidos():
+    resultado = asyncio.run(carga_local(20, 30))
+    assert resultado["requisicoes"] == 20
+    assert resultado["erros"] == 0
+    assert resultado["p50_ms"] <= resultado["p99_ms"]
+
+
+@pytest.mark.parametrize("parametros", [{"requisicoes": 0}, {"conexoes": 0}, {"janela": 0}])
+def test_gera_carga_rejeita_quantidades_vazias(parametros):
+    with pytest.raises(ValueError):
+        asyncio.run(servico.gera_carga(tarefa, **parametros))
+
+
+def test_agrupador_igual_a_cifra_individual():
+    async def cifra_todas():
+        agrupador = servico.Agrupador(max_lote=3, espera=0.001)
+        return await asyncio.gather(*(agrupador.cifra(f"MENSAGEM {i}", i) for i in range(7)))
+
+    assert asyncio.run(cifra_todas()) == [shift_cipher.shift_cipher(f"MENSAGEM {i}", i) for i in range(7)]
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import pytest
+
+import shift_cipher
+from conftest import raiz
+
+
+def test_importar_nao_executa_linha_de_comando():
+    # Um programa que importa o módulo com os próprios argumentos não pode cair na linha de comando nem no menu.
+    codigo = "import sys; sys.argv = ['programa', 'cifra', 'a', 'b', '3']; import shift_cipher"
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, stdin=subprocess.DEVNULL,
+                               capture_output=True, text=True, timeout=60)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout == ""
+
+
+def test_cifra_lote_igual_a_cifra_individual():
+    mensagens = ["ATAQUE AO AMANHECER", "", "xyz abc", "Z"]
+    deslocamentos = [3, 7, 25, 1]
+    esperado = [shift_cipher.shift_cipher(m, d) for m, d in zip(mensagens, deslocamentos)]
+    assert shift_cipher.cifra_lote(mensagens, deslocamentos) == esperado
+
+
+def test_cifra_lote_aceita_deslocamento_inteiro_do_numpy():
+    np = pytest.importorskip("numpy")
+    mensagens = ["ATAQUE", "DEFESA"]
+    assert shift_cipher.cifra_lote(mensagens, np.int64(3)) == shift_cipher.cifra_lote(mensagens, 3)
+
+
+def test_cifra_lote_rejeita_quantidade_errada_de_deslocamentos():
+    with pytest.raises(ValueError):
+        shift_cipher.cifra_lote(["A", "B"], [1])
+
+
+prosa = ("O desenvolvimento deste projeto forneceu uma visao abrangente sobre a implementacao e analise de diferentes "
+         "algoritmos de cifras classicas, permitindo observar as forcas e limitacoes de cada tecnica em termos de "
+         "seguranca, complexidade computacional e viabilidade de uso. ")
+
+
+def test_distribuicao_incremental_para_antes_do_fim(tmp_path):
+    arquivo = tmp_path / "cifrado.txt"
+    arquivo.write_text(shift_cipher.shift_cipher(prosa * 200, 11))
+    with open(arquivo, "rb") as entrada:
+        deslocamento, probabilidade, consumidos = shift_cipher.distribuicao_incremental(entrada)
+    assert deslocamento == 11
+    assert probabilidade >= 0.9999
+    assert consumidos <= 1024
+
+
+def test_distribuicao_incremental_nao_decide_com_poucas_letras():
+    deslocamento, probabilidade, consumidos = shift_cipher.distribuicao_incremental([shift_cipher.shift_cipher("ATAQUE", 3)])
+    assert probabilidade < 0.9999
+    assert consumidos == 6
+
+
+def test_confianca_atenuada_pela_temperatura():
+    contagem = shift_cipher.histograma(shift_cipher.shift_cipher(prosa[:60], 5))
+    quente = shift_cipher.confianca_deslocamentos(contagem, temperatura=2.0)
+    frio = shift_cipher.confianca_deslocamentos(contagem, temperatura=1.0)
+    assert quente.index(max(quente)) == frio.index(max(frio)) == 5
+    assert max(quente) < max(frio)
@@ -0,0 +1,56 @@
+import pickle
+import unicodedata
+
+import pytest
+
+import columnar_transposition
+import rail_fence
+import shift_cipher
+from texto import Texto
+
+frases = ["Ataque ao amanhecer!", "  espaços  no início e no fim  ", "Ação, coração; pé.", "SEM ESPACOS", "", "123"]
+
+
+@pytest.mark.parametrize("frase", frases)
+def test_normaliza_e_restaura(frase):
+    texto = Texto.normaliza(frase)
+    esperado = "".join(c for c in unicodedata.normalize("NFD", frase) if not unicodedata.combining(c))
+    assert str(texto) == esperado
+    assert texto.letras() == "".join(c for c in esperado.upper() if "A" <= c <= "Z")
+
+
+@pytest.mark.parametrize("frase", frases)
+def test_cifras_voltam_ao_texto_com_o_mesmo_indice(frase):
+    texto = Texto.normaliza(frase)
+    assert shift_cipher.decifra(shift_cipher.shift_cipher(texto, 7), 7) == texto
+    if len(texto) >= 2:
+        assert rail_fence.decifra(rail_fence.rail_fence(texto, 3), 3) == texto
+    colunar = columnar_transposition.decifra(columnar_transposition.transposition_cipher(texto, "CHAVE"), "CHAVE")
+    assert colunar.letras().rstrip("X") == texto.letras().rstrip("X")
+
+
+def test_cifras_iguais_as_de_str():
+    frase = "Ataque ao amanhecer pelo flanco"
+    texto = Texto.normaliza(frase)
+    letras = texto.letras()
+    assert shift_cipher.shift_cipher(texto, 3).letras() == shift_cipher.shift_cipher(letras, 3)
+    assert rail_fence.rail_fence(texto, 4).letras() == rail_fence.rail_fence(letras, 4).replace(" ", "")
+    assert columnar_transposition.transposition_cipher(texto, "CHAVE").letras() == \
+        columnar_transposition.transposition_cipher(letras, "CHAVE").replace(" ", "")
+
+
+def test_fatia_sem_copia_e_serializacao():
+    texto = Texto.normaliza("Ataque ao amanhecer")
+    fatia = texto[2:8]
+    assert isinstance(fatia.codigos, memoryview)
+    assert fatia.letras() == "AQUEAO"
+    assert texto[0] == 0
+    copia = pickle.loads(pickle.dumps(fatia))
+    assert copia == Texto(fatia.bytes()) and hash(copia) == hash(fatia)
+    assert pickle.loads(pickle.dumps(texto)) == texto
+
+
+def test_quebras_aceitam_texto():
+    mensagem = "OS SOLDADOS VAO ATACAR O FORTE AO AMANHECER"
+    cifrado = rail_fence.rail_fence(Texto.normaliza(mensagem), 4)
+    assert (4, mensagem.replace(" ", "")) in rail_fence.quebra_cifra(cifrado, 10)
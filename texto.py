@@ -0,0 +1,151 @@
+import re
+import unicodedata
+
+from modelo_linguagem import letras, nao_letras, tabela_codigos
+
+para_letras = bytes.maketrans(bytes(range(26)), letras.encode("ascii"))                 # leva os códigos 0 a 25 nas letras A-Z
+letra_x = 23                                                                            # código do X que completa as matrizes
+
+
+class Texto:
+    """
+    Um texto normalizado uma única vez: as letras viram códigos de 0 (A) a 25 (Z) num buffer de bytes,
+    e o que foi tirado (espaços, pontuação, minúsculas) fica num índice à parte, para ser restaurado na saída.
+    As funções de cifra e decifra dos módulos aceitam um Texto e retornam um Texto com o mesmo índice,
+    sem normalizar de novo; as de quebra usam as letras e retornam str, como com um texto comum.
+
+    Uso:
+        texto = Texto.normaliza("Ataque ao amanhecer!")
+        cifrado = shift_cipher.shift_cipher(texto, 3)
+        str(shift_cipher.decifra(cifrado, 3))       # 'Ataque ao amanhecer!'
+    """
+
+    __slots__ = ("codigos", "removidos", "minusculas")
+
+    def __init__(self, codigos, removidos=(), minusculas=()):
+        """
+        Parâmetros:
+        - codigos: bytes (ou memoryview) com um código de 0 a 25 por letra.
+        - removidos: uma tupla de (posição, trecho): o trecho de caracteres que não são letras
+          ficava antes da letra dessa posição.
+        - minusculas: uma tupla de (inicio, fim), os trechos de letras que eram minúsculas.
+        """
+
+        self.codigos = codigos
+        self.removidos = removidos
+        self.minusculas = minusculas
+
+    @classmethod
+    def normaliza(cls, texto):
+        """
+        Converte um texto em Texto. Acentos são removidos (Ç vira C), como em modelo_linguagem.codigos.
+
+        Parâmetros:
+        - texto: um str, bytes ou Texto (que é retornado como está).
+
+        Retorna:
+        - o Texto.
+        """
+
+        if isinstance(texto, Texto):
+            return texto
+        if isinstance(texto, (bytes, bytearray, memoryview)):
+            texto = bytes(texto).decode("utf-8")
+        if not texto.isascii():
+            texto = unicodedata.normalize("NFD", texto)
+            texto = "".join(c for c in texto if not unicodedata.combining(c))
+
+        # O índice guarda a posição de cada trecho em letras, não no texto original, para não depender dele.
+        removidos, antes = [], 0
+        for trecho in re.finditer(r"[^A-Za-z]+", texto):
+            removidos.append((trecho.start() - antes, trecho.group()))
+            antes += len(trecho.group())
+        so_letras = texto.encode("ascii", "replace").translate(None, nao_letras)
+        minusculas = tuple(trecho.span() for trecho in re.finditer(rb"[a-z]+", so_letras))
+        return cls(so_letras.translate(tabela_codigos), tuple(removidos), minusculas)
+
+    def com_codigos(self, codigos):
+        """
+        Cria um Texto com outros códigos e o mesmo índice, como o resultado de uma cifra.
+        """
+
+        return Texto(codigos, self.removidos, self.minusculas)
+
+    def bytes(self):
+        """
+        Retorna os códigos como bytes, copiando só se eles forem uma fatia (memoryview).
+        """
+
+        codigos = self.codigos
+        return codigos.tobytes() if isinstance(codigos, memoryview) else codigos
+
+    def letras(self):
+        """
+        Retorna as letras, em maiúsculas e sem os caracteres removidos, como str.
+        """
+
+        return self.bytes().translate(para_letras).decode("ascii")
+
+    def restaura(self, letras=None):
+        """
+        Devolve os caracteres removidos e as minúsculas às suas posições.
+
+        Parâmetros:
+        - letras: as letras a restaurar, como str (por padrão, as deste Texto), por exemplo uma mensagem decifrada por uma quebra.
+
+        Retorna:
+        - o texto restaurado, como str.
+        """
+
+        if letras is None:
+            letras = self.letras()
+        if self.minusculas:
+            partes, anterior = [], 0
+            for inicio, fim in self.minusculas:
+                partes += (letras[anterior:inicio], letras[inicio:fim].lower())
+                anterior = fim
+            partes.append(letras[anterior:])
+            letras = "".join(partes)
+        if self.removidos:
+            partes, anterior = [], 0
+            for posicao, trecho in self.removidos:
+                partes += (letras[anterior:posicao], trecho)
+                anterior = posicao
+            partes.append(letras[anterior:])
+            letras = "".join(partes)
+        return letras
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, indice):
+        """
+        Uma fatia é um Texto sobre os mesmos códigos, sem cópia e sem o índice de caracteres removidos.
+        Um índice inteiro retorna o código da letra.
+        """
+
+        if isinstance(indice, slice):
+            return Texto(memoryview(self.codigos)[indice])
+        return self.codigos[indice]
+
+    def __bytes__(self):
+        return bytes(self.codigos)
+
+    def __str__(self):
+        return self.restaura()
+
+    def __repr__(self):
+        return f"Texto({self.letras()!r})"
+
+    def __eq__(self, outro):
+        if not isinstance(outro, Texto):
+            return NotImplemented
+        return (self.codigos == outro.codigos and self.removidos == outro.removidos
+                and self.minusculas == outro.minusculas)
+
+    def __hash__(self):
+        return hash((self.bytes(), self.removidos, self.minusculas))
+
+    def __reduce__(self):
+        # Uma memoryview não pode ser serializada, então a fatia vai como bytes (para o cache e os processos).
+        return Texto, (self.bytes(), self.removidos, self.minusculas)